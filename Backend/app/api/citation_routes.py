@@ -1,6 +1,7 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from typing import Union
+from app.schemas.paper import CitationRequest, CitationResponse, CitationBatchRequest, CitationBatchResponse
 from app.services.semantic_retrieval_service import unified_semantic_search
 
 router = APIRouter(
@@ -8,30 +9,8 @@ router = APIRouter(
     tags=["citation_router"],
 )
 
-
-class CitationRequest(BaseModel):
-    text: str
-    use_arxiv: Optional[bool] = True
-    use_semantic_scholar: Optional[bool] = True
-    max_results_per_source: Optional[int] = 5
-    top_k: Optional[int] = 10
-    use_sbert: Optional[bool] = True
-
-class Paper(BaseModel):
-    title: str
-    authors: List[str]
-    summary: str
-    link: str
-    published: str
-    score: float  # similarity score
-    source: Optional[str] = None
-    venue: Optional[str] = None
-    paperId: Optional[str] = None
-
-class CitationResponse(BaseModel):
-    query: str
-    results: List[Paper]
-    sources_used: List[str]
+# Texts of one batch searched at the same time (each one queries every source)
+MAX_CONCURRENT_BATCH_SEARCHES = 4
 
 
 # -----------------------
@@ -48,41 +27,68 @@ async def recommend_citation(request: CitationRequest):
         raise HTTPException(status_code=400, detail="Text cannot be empty")
 
     try:
-        # Use unified_semantic_search for efficient retrieval (same as semantic_routes)
-        # This handles deduplication, parallel API calls, and semantic ranking automatically
-        retrieved_papers = await unified_semantic_search(
-            query=request.text,
-            max_results_per_source=request.max_results_per_source,
-            top_k=request.top_k,
-            use_sbert=request.use_sbert,
-            use_arxiv=request.use_arxiv,
-            use_semantic_scholar=request.use_semantic_scholar
-        )
+        return await _recommend(request.text, request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error recommending citations: {str(e)}")
+
 
-        # Determine which sources were actually used
-        sources_used = []
-        if request.use_arxiv:
-            sources_used.append("arXiv")
-        if request.use_semantic_scholar:
-            sources_used.append("Semantic Scholar")
+@router.post("/recommend_batch", response_model=CitationBatchResponse)
+async def recommend_citation_batch(request: CitationBatchRequest):
+    """
+    Recommend citations for several texts (e.g. the paragraphs of a draft) in one
+    request. Up to MAX_CONCURRENT_BATCH_SEARCHES texts are searched at a time with
+    the same options; results keep the order of the texts.
+    """
+    if not all(text.strip() for text in request.texts):
+        raise HTTPException(status_code=400, detail="Texts cannot be empty")
 
-        # Papers are already ranked by semantic similarity from unified_semantic_search
-        # Ensure all papers have required fields (same validation as semantic_routes)
-        for paper in retrieved_papers:
-            if paper.get("summary") is None or not isinstance(paper.get("summary"), str):
-                paper["summary"] = "No abstract available"
-            if paper.get("title") is None:
-                paper["title"] = "No title"
-            if not isinstance(paper.get("authors"), list):
-                paper["authors"] = []
-            if "source" not in paper:
-                paper["source"] = "unknown"
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_BATCH_SEARCHES)
 
-        return {
-            "query": request.text,
-            "results": retrieved_papers,
-            "sources_used": sources_used
-        }
-        
+    async def recommend_one(text: str) -> dict:
+        async with semaphore:
+            return await _recommend(text, request)
+
+    try:
+        results = await asyncio.gather(*(recommend_one(text) for text in request.texts))
+        return {"results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error recommending citations: {str(e)}")
+
+
+async def _recommend(text: str, options: Union[CitationRequest, CitationBatchRequest]) -> dict:
+    """Search and rank papers for one text with the request's source and ranking options."""
+    # Use unified_semantic_search for efficient retrieval (same as semantic_routes)
+    # This handles deduplication, parallel API calls, and semantic ranking automatically
+    retrieved_papers = await unified_semantic_search(
+        query=text,
+        max_results_per_source=options.max_results_per_source,
+        top_k=options.top_k,
+        use_sbert=options.use_sbert,
+        use_arxiv=options.use_arxiv,
+        use_semantic_scholar=options.use_semantic_scholar
+    )
+
+    # Determine which sources were actually used
+    sources_used = []
+    if options.use_arxiv:
+        sources_used.append("arXiv")
+    if options.use_semantic_scholar:
+        sources_used.append("Semantic Scholar")
+
+    # Papers are already ranked by semantic similarity from unified_semantic_search
+    # Ensure all papers have required fields (same validation as semantic_routes)
+    for paper in retrieved_papers:
+        if paper.get("summary") is None or not isinstance(paper.get("summary"), str):
+            paper["summary"] = "No abstract available"
+        if paper.get("title") is None:
+            paper["title"] = "No title"
+        if not isinstance(paper.get("authors"), list):
+            paper["authors"] = []
+        if "source" not in paper:
+            paper["source"] = "unknown"
+
+    return {
+        "query": text,
+        "results": retrieved_papers,
+        "sources_used": sources_used
+    }
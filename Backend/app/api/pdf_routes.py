@@ -1,9 +1,20 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import List,Optional
-from app.services.pdf_service import extract_texts_from_multiple_pdfs,extract_text_from_pdf
-from app.services.summarizer_service import summarize_pdf, answer_question
-import tempfile
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import BinaryIO,List,Optional,Tuple
+from app.services.pdf_service import extract_texts_from_multiple_pdfs,extract_text_from_pdf,get_pdf_pool
+from app.services.summarizer_service import asummarize_pdf, aanswer_question, astream_answer_question
+from app.services.batch_summarizer import (
+    OPENAI_WEBHOOK_SECRET,
+    submit_batch,
+    get_batch_summary,
+    handle_batch_webhook
+)
+from app.utils.pdf_cache import pdf_cache_hasher, get_cached_document, set_cached_document
+from app.utils.streaming import sse_events
+import asyncio
 import os
+import tempfile
+import uuid
 from pydantic import BaseModel
 
 
@@ -12,8 +23,16 @@ router = APIRouter(
     tags=["pdf"]
 )
 
+# Bounds concurrent extract+summarize work (and LLM calls) across all uploads
+MAX_CONCURRENT_UPLOADS = 8
+_upload_semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+# Uploads are copied to disk in pieces of this size instead of being read whole
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 class QuestionRequest(BaseModel):
-    pdf_texts: List[str]
+    # Either the texts themselves or the pdf_ids returned by /upload
+    pdf_texts: Optional[List[str]] = []
+    pdf_ids: Optional[List[str]] = []
     question: str
     conversation_history: Optional[str] = ""
 
@@ -27,31 +46,152 @@ async def upload_pdfs(files: List[UploadFile] = File(...)):
     if not files:
         raise HTTPException(status_code=400, detail="No files uploaded.")
     
-    texts = []
-    summaries = []
+    # Files are processed concurrently; results keep upload order
+    results = await asyncio.gather(*(_process_upload(file) for file in files))
+    pdf_ids = [pdf_id for pdf_id, _, _ in results]
+    texts = [text for _, text, _ in results]
+    summaries = [summary for _, _, summary in results]
     
-    for file in files:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            content = await file.read()
-            tmp.write(content)
-            tmp_path = tmp.name
-        
-        text = extract_text_from_pdf(tmp_path)
-        texts.append(text)
-        summary = summarize_pdf(text)
-        summaries.append(summary)
-        os.remove(tmp_path)
+    # pdf_ids let later questions reference the extracted text instead of resending it
+    return {"summaries": summaries, "pdf_texts": texts, "pdf_ids": pdf_ids}
+
+
+async def _process_upload(file: UploadFile) -> Tuple[Optional[str], str, str]:
+    """Extract and summarize one uploaded PDF without blocking the event loop."""
+    async with _upload_semaphore:
+        pdf_id, text = await _extract_text(file)
+        summary = await asummarize_pdf(text)
+        return pdf_id, text, summary
+
+
+async def _extract_text(file: UploadFile) -> Tuple[Optional[str], str]:
+    """
+    Extract an uploaded PDF's text, reusing the cached result for content seen before.
+    The upload is copied to a temp file in chunks and hashed on the way, so the
+    whole PDF is never held in memory; the worker process parses it from disk.
+    Returns (pdf_id, text); pdf_id is the hex content hash the text is cached
+    under, or None if extraction failed.
+    """
+    tmp_path, key = await asyncio.to_thread(_spool_upload, file.file)
     
-    return {"summaries": summaries, "pdf_texts": texts}
+    try:
+        text = await asyncio.to_thread(get_cached_document, key, "text")
+        if text is not None:
+            return key.hex(), text
+        # Parsing is CPU-bound, so it runs in a worker process rather than a thread
+        text = await asyncio.get_running_loop().run_in_executor(
+            get_pdf_pool(), extract_text_from_pdf, tmp_path
+        )
+        # Extraction failures come back as an error message; don't cache those
+        if text.startswith("Error extracting text:"):
+            return None, text
+        await asyncio.to_thread(set_cached_document, key, "text", text)
+        return key.hex(), text
+    finally:
+        os.remove(tmp_path)
+
+
+def _spool_upload(source: BinaryIO) -> Tuple[str, bytes]:
+    """
+    Copy an upload to a temp file in chunks, hashing it on the way.
+    Blocking file I/O, so it runs in a thread. Returns (temp path, content hash).
+    """
+    hasher = pdf_cache_hasher()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+        while chunk := source.read(UPLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+            tmp.write(chunk)
+    return tmp.name, hasher.digest()
+
+
+async def _resolve_pdf_texts(req: QuestionRequest) -> List[str]:
+    """The request's PDF texts, looking up any pdf_ids in the document cache."""
+    texts = list(req.pdf_texts or [])
+    for pdf_id in req.pdf_ids or []:
+        try:
+            key = bytes.fromhex(pdf_id)
+        except ValueError:
+            key = None
+        text = await asyncio.to_thread(get_cached_document, key, "text") if key else None
+        if text is None:
+            raise HTTPException(status_code=404, detail=f"Unknown pdf_id {pdf_id}; upload the PDF again.")
+        texts.append(text)
+    return texts
 
 
 
 @router.post("/question", response_model=QuestionResponse)
 async def ask_question(req: QuestionRequest):
-    if not req.pdf_texts or not req.question.strip():
+    pdf_texts = await _resolve_pdf_texts(req)
+    if not pdf_texts or not req.question.strip():
         raise HTTPException(status_code=400, detail="PDFs or question missing.")
     try:
-        answer = answer_question(req.pdf_texts, req.question, req.conversation_history or "")
+        answer = await aanswer_question(pdf_texts, req.question, req.conversation_history or "")
         return {"answer": answer}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating answer: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating answer: {e}")
+
+
+@router.post("/question/stream")
+async def ask_question_stream(req: QuestionRequest):
+    """Stream the answer as Server-Sent Events while it is generated."""
+    pdf_texts = await _resolve_pdf_texts(req)
+    if not pdf_texts or not req.question.strip():
+        raise HTTPException(status_code=400, detail="PDFs or question missing.")
+    return StreamingResponse(
+        sse_events(astream_answer_question(pdf_texts, req.question, req.conversation_history or "")),
+        media_type="text/event-stream"
+    )
+
+
+# Bulk summarization through the OpenAI Batch API: cheaper, but results arrive
+# within the batch completion window rather than in the response
+@router.post("/batch-summarize")
+async def batch_summarize_pdfs(files: List[UploadFile] = File(...)):
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded.")
+    
+    extracted = await asyncio.gather(*(_extract_text(file) for file in files))
+    
+    # Failed extractions come back without a pdf_id; they are reported instead of
+    # being sent off to be summarized
+    texts = {}
+    jobs = []
+    failed = []
+    for file, (pdf_id, text) in zip(files, extracted):
+        if pdf_id is None:
+            failed.append({"filename": file.filename, "error": text})
+            continue
+        job_id = uuid.uuid4().hex
+        texts[job_id] = text
+        jobs.append({"filename": file.filename, "job_id": job_id})
+    
+    batch_id = None
+    if texts:
+        try:
+            batch_id = await submit_batch(texts)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error submitting batch: {e}")
+    
+    return {"batch_id": batch_id, "jobs": jobs, "failed": failed}
+
+
+@router.get("/batch-summary/{job_id}")
+async def batch_summary(job_id: str):
+    result = await get_batch_summary(job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Unknown job_id.")
+    return {"job_id": job_id, **result}
+
+
+@router.post("/batch-complete")
+async def batch_complete(request: Request):
+    """OpenAI webhook: store the results of a finished batch."""
+    if not OPENAI_WEBHOOK_SECRET:
+        raise HTTPException(status_code=404, detail="Batch webhook is not configured.")
+    payload = await request.body()
+    try:
+        batch_id = await handle_batch_webhook(payload, dict(request.headers))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid webhook: {e}")
+    return {"batch_id": batch_id}
@@ -1,7 +1,9 @@
 from fastapi import APIRouter,Depends,Path,HTTPException,Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List,Optional
-from app.services.summarizer_service import summarize_text,enhance_prompt
+from app.services.summarizer_service import asummarize_text,aenhance_prompt,astream_summarize_text,astream_enhance_prompt
+from app.utils.streaming import sse_events
 
 router = APIRouter(
     prefix="/queries",
@@ -19,7 +21,7 @@ async def summarize_text_endpoint(text: str = Query(..., min_length=1)):
     Summarize the provided text using a language model.
     """
     try:
-        summary = summarize_text(text)
+        summary = await asummarize_text(text)
         return {
             "original_text": text,
             "summary": summary
@@ -33,10 +35,24 @@ async def enhance_prompt_endpoint(prompt: str = Query(..., min_length=1)):
     Enhance the provided prompt using a language model.
     """
     try:
-        enhanced_prompt = enhance_prompt(prompt)  #
+        enhanced_prompt = await aenhance_prompt(prompt)
         return {
             "original_prompt": prompt,
             "enhanced_prompt": enhanced_prompt
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error enhancing prompt: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error enhancing prompt: {str(e)}")
+
+@router.get("/summarize/stream")
+async def summarize_text_stream_endpoint(text: str = Query(..., min_length=1)):
+    """
+    Stream the summary as Server-Sent Events while it is generated.
+    """
+    return StreamingResponse(sse_events(astream_summarize_text(text)), media_type="text/event-stream")
+
+@router.post("/ehance_prompt/stream")
+async def enhance_prompt_stream_endpoint(prompt: str = Query(..., min_length=1)):
+    """
+    Stream the enhanced prompt as Server-Sent Events while it is generated.
+    """
+    return StreamingResponse(sse_events(astream_enhance_prompt(prompt)), media_type="text/event-stream")
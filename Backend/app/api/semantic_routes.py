@@ -1,12 +1,13 @@
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Dict, Optional
+from app.schemas.paper import Paper
 from app.services.semantic_retrieval_service import (
     unified_semantic_search,
     semantic_search_with_abstracts
 )
-from app.services.summarizer_service import summarize_text
-from app.services.embedding_service import get_embedding, get_or_compute_embedding, rank_by_similarity
+from app.services.summarizer_service import asummarize_text
+from app.services.embedding_service import get_embedding, get_or_compute_embeddings, rank_by_similarity
 import asyncio
 
 router = APIRouter(
@@ -29,17 +30,6 @@ class PipelineRequest(BaseModel):
     generate_summary: Optional[bool] = True
     generate_citations: Optional[bool] = True
 
-class Paper(BaseModel):
-    title: str
-    authors: List[str]
-    summary: str
-    link: str
-    published: str
-    score: float
-    source: Optional[str] = None
-    venue: Optional[str] = None
-    paperId: Optional[str] = None
-
 class SemanticSearchResponse(BaseModel):
     query: str
     results: List[Paper]
@@ -100,11 +90,12 @@ async def semantic_pipeline(request: PipelineRequest):
     
     try:
         # Step 1: Semantic retrieval
-        retrieved_papers = await unified_semantic_search(
+        retrieved_papers, query_embedding = await unified_semantic_search(
             query=request.query,
             max_results_per_source=request.max_results_per_source,
             top_k=request.top_k,
-            use_sbert=request.use_sbert
+            use_sbert=request.use_sbert,
+            return_query_embedding=True
         )
         
         summary = None
@@ -121,39 +112,30 @@ async def semantic_pipeline(request: PipelineRequest):
             
             if abstracts:
                 combined_text = "\n\n".join(abstracts)
-                summary = summarize_text(combined_text)
+                summary = await asummarize_text(combined_text)
         
         # Step 3: Citation recommendation (if requested)
         if request.generate_citations and retrieved_papers:
-            # Use summary if available, otherwise use query
-            citation_query = summary if summary else request.query
-            
-            # Get embedding for citation query
-            citation_embedding = await get_embedding(citation_query, use_sbert=request.use_sbert)
-            
-            # Get embeddings for all retrieved papers
-            paper_embeddings = []
-            embedding_tasks = [
-                get_or_compute_embedding(paper, use_sbert=request.use_sbert)
-                for paper in retrieved_papers
-            ]
-            paper_embeddings = await asyncio.gather(*embedding_tasks, return_exceptions=True)
-            
-            # Filter valid embeddings
-            valid_pairs = []
-            for paper, embedding in zip(retrieved_papers, paper_embeddings):
-                if not isinstance(embedding, Exception):
-                    valid_pairs.append((paper, embedding))
-            
-            if valid_pairs:
-                papers, embeddings = zip(*valid_pairs)
-                # Rank by similarity to summary/query
-                citations = rank_by_similarity(
-                    citation_embedding,
-                    list(papers),
-                    list(embeddings),
-                    top_k=min(10, len(papers))
+            # Use summary if available, otherwise reuse the query embedding from retrieval
+            if summary:
+                citation_embedding, paper_embeddings = await asyncio.gather(
+                    get_embedding(summary, use_sbert=request.use_sbert),
+                    get_or_compute_embeddings(retrieved_papers, use_sbert=request.use_sbert)
                 )
+            else:
+                citation_embedding = query_embedding
+                paper_embeddings = await get_or_compute_embeddings(
+                    retrieved_papers, use_sbert=request.use_sbert
+                )
+            
+            # Rank by similarity to summary/query
+            citations = rank_by_similarity(
+                citation_embedding,
+                retrieved_papers,
+                paper_embeddings,
+                top_k=min(10, len(retrieved_papers)),
+                prenormalized=True
+            )
         
         return {
             "query": request.query,
@@ -0,0 +1,43 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class Paper(BaseModel):
+    title: str
+    authors: List[str]
+    summary: str
+    link: str
+    published: str
+    score: float  # similarity score
+    source: Optional[str] = None
+    venue: Optional[str] = None
+    paperId: Optional[str] = None
+
+class CitationRequest(BaseModel):
+    text: str
+    use_arxiv: Optional[bool] = True
+    use_semantic_scholar: Optional[bool] = True
+    max_results_per_source: Optional[int] = 5
+    top_k: Optional[int] = 10
+    use_sbert: Optional[bool] = True
+
+class CitationResponse(BaseModel):
+    query: str
+    results: List[Paper]
+    sources_used: List[str]
+
+
+# Each text runs its own arXiv and Semantic Scholar searches, so a batch is kept
+# small enough not to run into the sources' rate limits
+MAX_CITATION_BATCH_TEXTS = 20
+
+class CitationBatchRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=MAX_CITATION_BATCH_TEXTS)
+    use_arxiv: Optional[bool] = True
+    use_semantic_scholar: Optional[bool] = True
+    max_results_per_source: Optional[int] = 5
+    top_k: Optional[int] = 10
+    use_sbert: Optional[bool] = True
+
+class CitationBatchResponse(BaseModel):
+    results: List[CitationResponse]
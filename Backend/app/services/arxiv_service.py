@@ -1,10 +1,16 @@
 import arxiv
+import asyncio
 from typing import List, Dict
 
 async def search_arxiv(query: str, max_results: int = 5) -> List[Dict]:
     """
     Search arXiv using the arxiv Python library and return top results.
+    The blocking fetch runs in a worker thread so concurrent searches overlap.
     """
+    return await asyncio.to_thread(_search_arxiv_sync, query, max_results)
+
+
+def _search_arxiv_sync(query: str, max_results: int) -> List[Dict]:
     # Construct the default client
     client = arxiv.Client()
     
@@ -0,0 +1,277 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import openai
+import orjson
+from app.utils.env import load_env
+from openai import AsyncOpenAI
+
+from app.services.summarizer_service import (
+    llm,
+    MAX_TOKENS,
+    SUMMARIZE_PDF_INSTRUCTION,
+    adaptive_prompt
+)
+
+load_env()
+
+# Non-interactive PDF summaries go through the OpenAI Batch API: half the price of
+# chat completions and a separate rate limit, at the cost of a completion window
+# of up to 24 hours. Interactive requests keep using summarizer_service directly.
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_ENDPOINT = "/v1/chat/completions"
+# Seconds between status checks when no webhook secret is configured
+BATCH_POLL_INTERVAL = 60
+# Consecutive failed status checks after which polling gives up on a batch
+BATCH_POLL_MAX_FAILURES = 30
+# Signing secret of the OpenAI webhook that calls /pdf/batch-complete; without it
+# each submitted batch is polled instead
+OPENAI_WEBHOOK_SECRET = os.getenv("OPENAI_WEBHOOK_SECRET", "")
+
+_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# Status check errors that retrying won't fix (unknown batch, bad credentials)
+_FATAL_POLL_ERRORS = (
+    openai.NotFoundError,
+    openai.AuthenticationError,
+    openai.PermissionDeniedError,
+    openai.BadRequestError
+)
+
+# Job state lives in SQLite so it survives restarts and is shared by all uvicorn
+# workers: a batch can take up to a day, and its webhook may reach any worker.
+# Jobs are deleted BATCH_JOB_TTL seconds after they were submitted.
+BATCH_DB_DIR = Path(__file__).parent.parent.parent / "cache" / "batch"
+BATCH_DB_DIR.mkdir(parents=True, exist_ok=True)
+BATCH_DB_PATH = BATCH_DB_DIR / "jobs.sqlite3"
+BATCH_JOB_TTL = 7 * 24 * 3600
+
+_client: Optional[AsyncOpenAI] = None
+_job_db = None
+_job_db_lock = threading.Lock()
+# Batches this process is polling, and the tasks doing it (kept referenced until done)
+_polled_batches = set()
+_poll_tasks = set()
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Get the shared async OpenAI client, created on first use.
+    """
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI()
+    return _client
+
+
+def _get_job_db() -> sqlite3.Connection:
+    """Open the batch job database on first use."""
+    global _job_db
+    if _job_db is None:
+        _job_db = sqlite3.connect(BATCH_DB_PATH, check_same_thread=False, timeout=30)
+        _job_db.execute(
+            "CREATE TABLE IF NOT EXISTS batch_jobs "
+            "(job_id TEXT PRIMARY KEY, batch_id TEXT, status TEXT NOT NULL, "
+            "summary TEXT, error TEXT, created REAL NOT NULL)"
+        )
+        _job_db.execute("CREATE INDEX IF NOT EXISTS batch_jobs_batch ON batch_jobs (batch_id)")
+        _job_db.execute("CREATE INDEX IF NOT EXISTS batch_jobs_created ON batch_jobs (created)")
+        _job_db.commit()
+    return _job_db
+
+
+def _execute(sql: str, params=()) -> List[tuple]:
+    """Run one statement against the job database and commit it."""
+    with _job_db_lock:
+        db = _get_job_db()
+        rows = db.execute(sql, params).fetchall()
+        db.commit()
+    return rows
+
+
+def _batch_line(job_id: str, text: str) -> bytes:
+    """One JSONL request, built like asummarize_pdf's chat completion."""
+    return orjson.dumps({
+        "custom_id": job_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": llm.model_name,
+            "temperature": llm.temperature,
+            "max_tokens": MAX_TOKENS["summarize_pdf"],
+            "messages": [
+                {"role": "user", "content": adaptive_prompt(text, base_instruction=SUMMARIZE_PDF_INSTRUCTION)}
+            ],
+        },
+    })
+
+
+async def submit_batch(texts: Dict[str, str]) -> str:
+    """
+    Upload the given PDF texts (by job id) as one batch input file and start the
+    batch. Returns the batch id.
+    """
+    now = time.time()
+    with _job_db_lock:
+        db = _get_job_db()
+        db.execute("DELETE FROM batch_jobs WHERE created < ?", (now - BATCH_JOB_TTL,))
+        db.executemany(
+            "INSERT INTO batch_jobs (job_id, batch_id, status, created) VALUES (?, NULL, 'pending', ?)",
+            [(job_id, now) for job_id in texts]
+        )
+        db.commit()
+
+    payload = b"\n".join(_batch_line(job_id, text) for job_id, text in texts.items()) + b"\n"
+    client = get_openai_client()
+    try:
+        input_file = await client.files.create(file=("batch.jsonl", BytesIO(payload)), purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW
+        )
+    except Exception as e:
+        _fail(list(texts), f"Error submitting batch: {e}")
+        raise
+
+    with _job_db_lock:
+        db = _get_job_db()
+        db.executemany(
+            "UPDATE batch_jobs SET batch_id = ? WHERE job_id = ?", [(batch.id, job_id) for job_id in texts]
+        )
+        db.commit()
+    if not OPENAI_WEBHOOK_SECRET:
+        _start_polling(batch.id)
+    return batch.id
+
+
+def _start_polling(batch_id: str):
+    """Poll a batch from this process until it finishes, unless already doing so."""
+    if batch_id in _polled_batches:
+        return
+    _polled_batches.add(batch_id)
+    task = asyncio.create_task(poll_batch(batch_id))
+    _poll_tasks.add(task)
+    task.add_done_callback(_poll_tasks.discard)
+    task.add_done_callback(lambda _: _polled_batches.discard(batch_id))
+
+
+async def poll_batch(batch_id: str):
+    """
+    Wait for a batch to finish, then store its results.
+    The batch's pending jobs are failed if its status can't be checked: at once
+    for errors retrying won't fix, otherwise after BATCH_POLL_MAX_FAILURES
+    failures in a row.
+    """
+    client = get_openai_client()
+    failures = 0
+    while True:
+        try:
+            batch = await client.batches.retrieve(batch_id)
+        except Exception as e:
+            print(f"Error polling batch {batch_id}: {e}")
+            failures += 1
+            if isinstance(e, _FATAL_POLL_ERRORS) or failures >= BATCH_POLL_MAX_FAILURES:
+                _fail_pending(batch_id, f"Error polling batch: {e}")
+                return
+        else:
+            if batch.status in _TERMINAL_STATUSES:
+                break
+            failures = 0
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+    await collect_batch_results(batch_id)
+
+
+async def collect_batch_results(batch_id: str):
+    """
+    Download a finished batch's output and error files and record each summary.
+    """
+    client = get_openai_client()
+    batch = await client.batches.retrieve(batch_id)
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        content = await client.files.content(file_id)
+        for line in content.content.splitlines():
+            if line.strip():
+                _record_result(batch_id, orjson.loads(line))
+
+    # Requests that produced no line at all (failed, expired or cancelled batch)
+    if _fail_pending(batch_id, f"Batch {batch.status}"):
+        print(f"Batch {batch_id} ended with status {batch.status}")
+
+
+def _record_result(batch_id: str, item: dict):
+    job_id = item.get("custom_id")
+    response = item.get("response") or {}
+    if response.get("status_code") == 200:
+        summary = response["body"]["choices"][0]["message"]["content"]
+        _execute(
+            "UPDATE batch_jobs SET status = 'completed', summary = ?, error = NULL WHERE job_id = ? AND batch_id = ?",
+            (summary, job_id, batch_id)
+        )
+    else:
+        error = item.get("error") or response.get("body", {}).get("error")
+        _fail([job_id], f"Error summarizing PDF: {error}")
+
+
+def _fail(job_ids: List[str], error: str):
+    with _job_db_lock:
+        db = _get_job_db()
+        db.executemany(
+            "UPDATE batch_jobs SET status = 'failed', summary = NULL, error = ? WHERE job_id = ?",
+            [(error, job_id) for job_id in job_ids]
+        )
+        db.commit()
+
+
+def _fail_pending(batch_id: str, error: str) -> List[str]:
+    """Fail the batch's jobs that are still pending. Returns their job ids."""
+    job_ids = [
+        job_id for (job_id,) in
+        _execute("SELECT job_id FROM batch_jobs WHERE batch_id = ? AND status = 'pending'", (batch_id,))
+    ]
+    if job_ids:
+        _fail(job_ids, error)
+    return job_ids
+
+
+async def get_batch_summary(job_id: str) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Get the status and summary of a submitted PDF, or None if it is unknown.
+    A pending job whose batch no process here is polling (e.g. after a restart,
+    or a missed webhook) has its batch checked and collected once it has finished.
+    """
+    rows = _execute("SELECT batch_id, status, summary, error FROM batch_jobs WHERE job_id = ?", (job_id,))
+    if not rows:
+        return None
+    batch_id, status, summary, error = rows[0]
+    if status == "pending" and batch_id and batch_id not in _polled_batches:
+        try:
+            batch = await get_openai_client().batches.retrieve(batch_id)
+        except Exception as e:
+            print(f"Error checking batch {batch_id}: {e}")
+            return {"status": status, "summary": summary, "error": error}
+        if batch.status in _TERMINAL_STATUSES:
+            await collect_batch_results(batch_id)
+            return await get_batch_summary(job_id)
+        if not OPENAI_WEBHOOK_SECRET:
+            _start_polling(batch_id)
+    return {"status": status, "summary": summary, "error": error}
+
+
+async def handle_batch_webhook(payload: bytes, headers: dict) -> Optional[str]:
+    """
+    Verify an OpenAI webhook delivery and store the results of the batch it reports.
+    Returns the batch id when the event was a finished batch.
+    """
+    event = get_openai_client().webhooks.unwrap(payload, headers, secret=OPENAI_WEBHOOK_SECRET)
+    if not event.type.startswith("batch."):
+        return None
+    await collect_batch_results(event.data.id)
+    return event.data.id
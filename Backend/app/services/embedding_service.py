@@ -1,9 +1,14 @@
 import os
-from typing import List, Optional, Dict
+import asyncio
+from typing import List, Optional, Dict, Union
 import numpy as np
-from dotenv import load_dotenv
-import pickle
-import json
+from app.utils.env import load_env
+import re
+import xxhash
+from cachetools import LRUCache
+import sqlite3
+import threading
+import weakref
 from pathlib import Path
 
 # Try to import Sentence-BERT, fallback to OpenAI if not available
@@ -24,26 +29,71 @@ except ImportError:
 
 import openai
 
-load_dotenv()
+load_env()
 
 # Cache directory for embeddings (relative to this file)
 CACHE_DIR = Path(__file__).parent.parent.parent / "cache" / "embeddings"
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
+# Content-addressed embedding store shared across requests and restarts
+CACHE_DB_PATH = CACHE_DIR / "embeddings.sqlite3"
+_cache_db = None
+_cache_db_lock = threading.Lock()
+# In-process LRU in front of the database, keyed like it (guarded by _cache_db_lock)
+EMBEDDING_LRU_SIZE = 50000
+_embedding_cache = LRUCache(maxsize=EMBEDDING_LRU_SIZE)  # Maps cache key -> float32 embedding
+# Vectors are stored as int8 with one float scale per vector (symmetric
+# quantization, 4x smaller than float32); they are dequantized to float32 on load
+CACHE_DTYPE = "int8"
+
+# Near-duplicate lookup: texts whose SimHash fingerprints differ by at most
+# SIMHASH_MAX_DISTANCE bits reuse the same cached embedding. Kept to one bit,
+# since texts differing in a meaningful word or two (a negation, a number) can
+# land within a few bits of each other and need their own embeddings
+SIMHASH_MAX_DISTANCE = 1
+SIMHASH_MIN_TOKENS = 20
+_TOKEN_RE = re.compile(r"\w+")
+_simhash_index = {}  # Maps model name -> (fingerprints, cache keys)
+
+SBERT_MODEL_NAME = 'all-MiniLM-L6-v2'
+# encode() sorts inputs by length and pads per batch, so one call over all
+# texts is much cheaper than one call per text
+SBERT_BATCH_SIZE = 64
+
+
+
+def _load_sbert_model():
+    """
+    Load the Sentence-BERT model, on the GPU with FP16 weights when CUDA is
+    available (half the memory traffic, negligible accuracy change), else on CPU.
+    """
+    import torch
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = SentenceTransformer(SBERT_MODEL_NAME, device=device)
+    if device == "cuda":
+        model = model.half()
+    return model
+
+
 # Initialize Sentence-BERT model if available
 _sbert_model = None
 if SENTENCE_BERT_AVAILABLE:
     try:
-        _sbert_model = SentenceTransformer('all-MiniLM-L6-v2')
-        print("Loaded Sentence-BERT model: all-MiniLM-L6-v2")
+        _sbert_model = _load_sbert_model()
+        print(f"Loaded Sentence-BERT model: {SBERT_MODEL_NAME} on {_sbert_model.device}")
     except Exception as e:
         print(f"Error loading Sentence-BERT model: {e}")
         SENTENCE_BERT_AVAILABLE = False
 
-# FAISS index for cached embeddings
-_faiss_index = None
-_embedding_cache = {}  # Maps paper_id -> embedding
-_paper_metadata = {}  # Maps index -> paper metadata
+# OpenAI accepts at most this many inputs per embeddings request
+OPENAI_MAX_BATCH_SIZE = 2048
+
+# Single-text OpenAI requests from concurrent callers are coalesced for up to
+# OPENAI_COALESCE_WAIT seconds or OPENAI_COALESCE_SIZE inputs per API call
+OPENAI_COALESCE_SIZE = 96
+OPENAI_COALESCE_WAIT = 0.02
+OPENAI_MAX_CONCURRENT_REQUESTS = 4
+_embedding_batchers = weakref.WeakKeyDictionary()  # Maps event loop -> {model: batcher}
 
 
 def get_embedding_model():
@@ -51,7 +101,7 @@ def get_embedding_model():
     global _sbert_model
     if SENTENCE_BERT_AVAILABLE and _sbert_model is None:
         try:
-            _sbert_model = SentenceTransformer('all-MiniLM-L6-v2')
+            _sbert_model = _load_sbert_model()
         except Exception as e:
             print(f"Error loading Sentence-BERT model: {e}")
     return _sbert_model
@@ -61,27 +111,128 @@ async def get_embedding_openai(text: str, model: str = "text-embedding-3-large")
     """
     Generate vector embedding using OpenAI API.
     """
-    try:
-        resp = openai.embeddings.create(
+    return await _get_embedding_batcher(model).embed(text)
+
+
+async def get_embeddings_openai(
+    texts: List[str],
+    model: str = "text-embedding-3-large"
+) -> List[List[float]]:
+    """
+    Generate vector embeddings for many texts using batched OpenAI API calls.
+    Texts are split into chunks of at most OPENAI_MAX_BATCH_SIZE inputs and the
+    chunks are requested concurrently. Embeddings are returned in input order.
+    """
+    async def _embed_chunk(chunk: List[str]) -> List[List[float]]:
+        resp = await asyncio.to_thread(
+            openai.embeddings.create,
             model=model,
-            input=text
+            input=chunk
         )
-        return resp.data[0].embedding
+        return [item.embedding for item in resp.data]
+
+    chunks = [
+        texts[i:i + OPENAI_MAX_BATCH_SIZE]
+        for i in range(0, len(texts), OPENAI_MAX_BATCH_SIZE)
+    ]
+    try:
+        results = await asyncio.gather(*(_embed_chunk(chunk) for chunk in chunks))
     except Exception as e:
-        print(f"Error generating OpenAI embedding: {e}")
+        print(f"Error generating OpenAI embeddings: {e}")
         raise
 
+    return [embedding for chunk_embeddings in results for embedding in chunk_embeddings]
+
 
-def get_embedding_sbert(text: str) -> np.ndarray:
+class EmbeddingBatcher:
+    """
+    Collects single-text OpenAI embedding requests across concurrent callers
+    and sends them as one API call per batch. A batch is sent once it holds
+    max_batch texts or max_wait seconds after its first text arrived; at most
+    OPENAI_MAX_CONCURRENT_REQUESTS batches are in flight at a time.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        max_batch: int = OPENAI_COALESCE_SIZE,
+        max_wait: float = OPENAI_COALESCE_WAIT
+    ):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENT_REQUESTS)
+        self._worker = None
+        self._flushes = set()
+
+    async def embed(self, text: str) -> List[float]:
+        """Queue text for the next batch and wait for its embedding."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._collect())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Keep collecting while this batch is in flight
+            flush = asyncio.create_task(self._flush(batch))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch):
+        texts = [text for text, _ in batch]
+        try:
+            async with self._semaphore:
+                embeddings = await get_embeddings_openai(texts, self.model)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+
+def _get_embedding_batcher(model: str) -> EmbeddingBatcher:
+    """Get the batcher for model on the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    batchers = _embedding_batchers.setdefault(loop, {})
+    if model not in batchers:
+        batchers[model] = EmbeddingBatcher(model)
+    return batchers[model]
+
+
+def get_embedding_sbert(text: Union[str, List[str]]) -> np.ndarray:
     """
     Generate vector embedding using Sentence-BERT.
-    Returns numpy array for efficient computation.
+    Accepts a single text or a list of texts (encoded in length-sorted batches).
+    Embeddings are L2-normalized. Returns numpy array for efficient computation.
     """
     model = get_embedding_model()
     if model is None:
         raise ValueError("Sentence-BERT model not available")
     
-    embedding = model.encode(text, convert_to_numpy=True)
+    embedding = model.encode(
+        text,
+        batch_size=SBERT_BATCH_SIZE,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+        normalize_embeddings=True
+    )
     return embedding
 
 
@@ -103,83 +254,340 @@ async def get_embedding(
         List of floats representing the embedding
     """
     if use_sbert and SENTENCE_BERT_AVAILABLE:
-        embedding = get_embedding_sbert(text)
+        # encode() is blocking model inference; keep it off the event loop
+        embedding = await asyncio.to_thread(get_embedding_sbert, text)
         return embedding.tolist()
     else:
         return await get_embedding_openai(text, model)
 
 
+async def get_embeddings(
+    texts: List[str],
+    use_sbert: bool = True,
+    model: str = "text-embedding-3-large"
+) -> np.ndarray:
+    """
+    Get embeddings for many texts with a single model call.
+    
+    Args:
+        texts: Texts to embed
+        use_sbert: If True, use Sentence-BERT (default). If False, use OpenAI.
+        model: OpenAI model name (only used if use_sbert=False)
+    
+    Returns:
+        L2-normalized float32 array of shape (len(texts), D), rows in the
+        same order as texts
+    """
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    if use_sbert and SENTENCE_BERT_AVAILABLE:
+        embeddings = await asyncio.to_thread(get_embedding_sbert, texts)
+    else:
+        embeddings = await get_embeddings_openai(texts, model)
+    return normalize_embeddings(np.array(embeddings, dtype=np.float32))
+
+
+def normalize_embeddings(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize the rows of a float32 matrix in place, so cosine similarity
+    becomes a plain dot product. All-zero rows stay zero.
+    """
+    norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+    np.maximum(norms, 1e-12, out=norms)
+    matrix /= norms[:, None]
+    return matrix
+
+
 def compute_cosine_similarity(embedding1: List[float], embedding2: List[float]) -> float:
     """
     Compute cosine similarity between two embeddings.
     """
-    vec1 = np.array(embedding1)
-    vec2 = np.array(embedding2)
+    vec1 = np.asarray(embedding1, dtype=np.float32)
+    vec2 = np.asarray(embedding2, dtype=np.float32)
     
-    dot_product = np.dot(vec1, vec2)
-    norm1 = np.linalg.norm(vec1)
-    norm2 = np.linalg.norm(vec2)
-    
-    if norm1 == 0 or norm2 == 0:
+    # Squared norms via vdot avoid np.linalg.norm's dispatch; one sqrt for both
+    norm_product = np.vdot(vec1, vec1) * np.vdot(vec2, vec2)
+    if norm_product == 0:
         return 0.0
     
-    return float(dot_product / (norm1 * norm2))
+    return float(np.dot(vec1, vec2) / np.sqrt(norm_product))
+
+
+def get_paper_text(paper: Dict) -> str:
+    """
+    Text used to embed a paper: its abstract, falling back to the title.
+    """
+    text = paper.get("summary", paper.get("abstract", ""))
+    if not text:
+        text = paper.get("title", "")
+    return text
+
+
+def get_embedding_model_name(use_sbert: bool = True, model: str = "text-embedding-3-large") -> str:
+    """
+    Name of the model that get_embedding will actually use.
+    """
+    if use_sbert and SENTENCE_BERT_AVAILABLE:
+        return SBERT_MODEL_NAME
+    return model
+
+
+def get_content_cache_key(text: str, model_name: str) -> bytes:
+    """
+    Generate a cache key from the embedded text and the model that embeds it.
+    Whitespace is normalized so trivial formatting changes still hit the cache.
+    xxh3 is stable across processes and restarts, unlike the built-in hash().
+    """
+    normalized = " ".join(text.split())
+    return xxhash.xxh3_128_digest(f"{model_name}\x00{normalized}".encode("utf-8"))
+
+
+def compute_simhash(text: str) -> Optional[int]:
+    """
+    64-bit SimHash fingerprint over the lowercased word unigrams of text.
+    Near-identical texts (whitespace, typos, small revisions) get fingerprints
+    a few bits apart. Returns None for texts too short to fingerprint reliably.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < SIMHASH_MIN_TOKENS:
+        return None
+    
+    token_hashes = np.array(
+        [xxhash.xxh3_64_intdigest(t.encode("utf-8")) for t in tokens],
+        dtype=np.uint64
+    )
+    bits = np.unpackbits(token_hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(tokens)
+    return int(np.packbits(votes > 0, bitorder="little").view(np.uint64)[0])
+
+
+def _get_cache_db() -> sqlite3.Connection:
+    """Open the embedding cache database on first use."""
+    global _cache_db
+    if _cache_db is None:
+        _cache_db = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+        _cache_db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key BLOB PRIMARY KEY, vec BLOB NOT NULL, model TEXT, simhash INTEGER, "
+            "dtype TEXT NOT NULL DEFAULT 'float32', scale REAL)"
+        )
+        # Older databases lack these columns; their vectors are float32
+        columns = {row[1] for row in _cache_db.execute("PRAGMA table_info(embeddings)")}
+        for column, column_type in (
+            ("model", "TEXT"),
+            ("simhash", "INTEGER"),
+            ("dtype", "TEXT NOT NULL DEFAULT 'float32'"),
+            ("scale", "REAL")
+        ):
+            if column not in columns:
+                _cache_db.execute(f"ALTER TABLE embeddings ADD COLUMN {column} {column_type}")
+        _cache_db.commit()
+    return _cache_db
+
+
+def _get_simhash_index(model_name: str) -> tuple:
+    """
+    Return (fingerprints, keys) for all cached embeddings of a model,
+    loading them from the database on first use.
+    """
+    with _cache_db_lock:
+        if model_name not in _simhash_index:
+            rows = _get_cache_db().execute(
+                "SELECT key, simhash FROM embeddings WHERE model = ? AND simhash IS NOT NULL",
+                (model_name,)
+            ).fetchall()
+            fingerprints = np.array([fp for _, fp in rows], dtype=np.int64).view(np.uint64)
+            _simhash_index[model_name] = (fingerprints, [key for key, _ in rows])
+        return _simhash_index[model_name]
+
+
+def _load_embeddings(keys: List[bytes]) -> Dict[bytes, List[float]]:
+    """Fetch cached embeddings for the given keys in one query."""
+    if not keys:
+        return {}
+    placeholders = ",".join("?" * len(keys))
+    with _cache_db_lock:
+        rows = _get_cache_db().execute(
+            f"SELECT key, vec, dtype, scale FROM embeddings WHERE key IN ({placeholders})",
+            keys
+        ).fetchall()
+    
+    embeddings = {}
+    quantized = []
+    for row in rows:
+        if row[2] == "int8":
+            quantized.append(row)
+        else:
+            key, vec, dtype, scale = row
+            embeddings[key] = _decode_vector(vec, dtype, scale)
+    if quantized:
+        # Keys are per model, so all int8 rows share one dimension: decode them
+        # as a single (n, D) block instead of row by row
+        block = np.frombuffer(
+            b"".join(vec for _, vec, _, _ in quantized), dtype=np.int8
+        ).reshape(len(quantized), -1)
+        scales = np.array([scale for _, _, _, scale in quantized], dtype=np.float32)
+        block = block.astype(np.float32) * scales[:, None]
+        for (key, _, _, _), vec in zip(quantized, block):
+            # Copied, so an entry kept in the LRU doesn't pin the whole block
+            embeddings[key] = vec.copy()
+    return embeddings
+
+
+def _load_near_duplicates(texts: List[str], model_name: str) -> List[Optional[np.ndarray]]:
+    """
+    Find cached embeddings whose text fingerprint is within
+    SIMHASH_MAX_DISTANCE bits of each text's fingerprint.
+    """
+    results = [None] * len(texts)
+    fingerprints, keys = _get_simhash_index(model_name)
+    if not keys:
+        return results
+    
+    matches = {}
+    for i, text in enumerate(texts):
+        fingerprint = compute_simhash(text)
+        if fingerprint is None:
+            continue
+        distances = np.bitwise_count(fingerprints ^ np.uint64(fingerprint))
+        best = int(np.argmin(distances))
+        if distances[best] <= SIMHASH_MAX_DISTANCE:
+            matches[i] = keys[best]
+    
+    cached = _load_embeddings(list(set(matches.values())))
+    for i, key in matches.items():
+        results[i] = cached.get(key)
+    return results
 
 
-def get_paper_cache_key(paper: Dict) -> str:
+def _quantize(matrix: np.ndarray) -> tuple:
     """
-    Generate a cache key for a paper based on its unique identifier.
+    Symmetric per-vector int8 quantization: returns (int8 rows, scales) with
+    row ~= int8_row * scale.
     """
-    # Prefer paperId, then link, then title
-    if "paperId" in paper and paper["paperId"]:
-        return f"paper_{paper['paperId']}"
-    elif "link" in paper and paper["link"]:
-        # Extract arXiv ID from link if present
-        if "arxiv.org" in paper["link"]:
-            arxiv_id = paper["link"].split("/")[-1]
-            return f"arxiv_{arxiv_id}"
-        return f"link_{hash(paper['link'])}"
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.rint(matrix / scales[:, None]).astype(np.int8)
+    return quantized, scales
+
+
+def _decode_vector(vec: bytes, dtype: str, scale: Optional[float]) -> np.ndarray:
+    """Turn a stored vector back into an array; int8 rows are dequantized to float32."""
+    array = np.frombuffer(vec, dtype=dtype)
+    if dtype == "int8":
+        return array.astype(np.float32) * np.float32(scale)
+    return array
+
+
+def _store_embeddings(texts: List[str], embeddings: Union[np.ndarray, List[List[float]]], model_name: str):
+    """Insert embeddings with their text fingerprints in a single transaction."""
+    if not texts:
+        return
+    matrix = np.array(embeddings, dtype=np.float32)
+    keys = [get_content_cache_key(text, model_name) for text in texts]
+    if CACHE_DTYPE == "int8":
+        stored, scales = _quantize(matrix)
+        # The LRU holds the same dequantized vectors a database load returns, so
+        # scores don't depend on whether an embedding was served from memory
+        restored = stored.astype(np.float32) * scales[:, None].astype(np.float32)
+        scales = scales.tolist()
     else:
-        return f"title_{hash(paper.get('title', ''))}"
+        stored, scales = matrix.astype(CACHE_DTYPE), [None] * len(texts)
+        restored = stored.astype(np.float32)
+    
+    rows = []
+    for key, text, vec, scale in zip(keys, texts, stored, scales):
+        fingerprint = compute_simhash(text)
+        rows.append((
+            key,
+            vec.tobytes(),
+            model_name,
+            None if fingerprint is None else int(np.uint64(fingerprint).astype(np.int64)),
+            CACHE_DTYPE,
+            scale
+        ))
+    
+    with _cache_db_lock:
+        # Row copies, so a cached vector doesn't keep the whole batch array alive
+        _embedding_cache.update((key, vec.copy()) for key, vec in zip(keys, restored))
+        db = _get_cache_db()
+        with db:
+            cursor = db.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vec, model, simhash, dtype, scale) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        # Keep a loaded fingerprint index in sync with the new rows
+        if model_name in _simhash_index and cursor.rowcount:
+            fingerprints, index_keys = _simhash_index[model_name]
+            known = set(index_keys)
+            new_rows = [(key, fp) for key, _, _, fp, _, _ in rows if fp is not None and key not in known]
+            _simhash_index[model_name] = (
+                np.concatenate([fingerprints, np.array([fp for _, fp in new_rows], dtype=np.int64).view(np.uint64)]),
+                index_keys + [key for key, _ in new_rows]
+            )
 
 
-async def get_cached_embedding(paper: Dict) -> Optional[List[float]]:
+def _lookup_embeddings(texts: List[str], model_name: str) -> List[Optional[np.ndarray]]:
+    """
+    Look up cached embeddings for texts: exact content match first, then
+    near-duplicate match by SimHash. Near-duplicate hits are not stored under
+    their own content key, so a borrowed vector never becomes an exact match.
+    """
+    keys = [get_content_cache_key(text, model_name) for text in texts]
+    with _cache_db_lock:
+        embeddings = [_embedding_cache.get(key) for key in keys]
+    
+    # Only keys missing from the in-process LRU go to the database
+    cached = _load_embeddings([key for key, embedding in zip(keys, embeddings) if embedding is None])
+    if cached:
+        with _cache_db_lock:
+            _embedding_cache.update(cached)
+        embeddings = [
+            embedding if embedding is not None else cached.get(key)
+            for key, embedding in zip(keys, embeddings)
+        ]
+    
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        near = _load_near_duplicates([texts[i] for i in missing], model_name)
+        for i, embedding in zip(missing, near):
+            if embedding is not None:
+                embeddings[i] = embedding
+    
+    return embeddings
+
+
+async def get_cached_embedding(paper: Dict, use_sbert: bool = True) -> Optional[List[float]]:
     """
     Check if embedding for this paper is cached.
     Returns embedding if found, None otherwise.
     """
-    cache_key = get_paper_cache_key(paper)
-    cache_file = CACHE_DIR / f"{cache_key}.pkl"
-    
-    if cache_file.exists():
-        try:
-            with open(cache_file, 'rb') as f:
-                cached_data = pickle.load(f)
-                return cached_data.get("embedding")
-        except Exception as e:
-            print(f"Error loading cached embedding: {e}")
+    try:
+        cached = await asyncio.to_thread(
+            _lookup_embeddings,
+            [get_paper_text(paper)],
+            get_embedding_model_name(use_sbert)
+        )
+        if cached[0] is not None:
+            return cached[0].tolist()
+    except Exception as e:
+        print(f"Error loading cached embedding: {e}")
     
     return None
 
 
-async def cache_embedding(paper: Dict, embedding: List[float]):
+async def cache_embedding(paper: Dict, embedding: List[float], use_sbert: bool = True):
     """
     Cache the embedding for a paper.
     """
-    cache_key = get_paper_cache_key(paper)
-    cache_file = CACHE_DIR / f"{cache_key}.pkl"
-    
     try:
-        cache_data = {
-            "embedding": embedding,
-            "paper": {
-                "title": paper.get("title", ""),
-                "link": paper.get("link", ""),
-                "paperId": paper.get("paperId", "")
-            }
-        }
-        with open(cache_file, 'wb') as f:
-            pickle.dump(cache_data, f)
+        await asyncio.to_thread(
+            _store_embeddings,
+            [get_paper_text(paper)],
+            [embedding],
+            get_embedding_model_name(use_sbert)
+        )
     except Exception as e:
         print(f"Error caching embedding: {e}")
 
@@ -192,37 +600,117 @@ async def get_or_compute_embedding(
     Get embedding for a paper, using cache if available.
     """
     # Check cache first
-    cached_embedding = await get_cached_embedding(paper)
+    cached_embedding = await get_cached_embedding(paper, use_sbert=use_sbert)
     if cached_embedding is not None:
         return cached_embedding
     
     # Compute new embedding
-    text = paper.get("summary", paper.get("abstract", ""))
-    if not text:
-        text = paper.get("title", "")
-    
-    embedding = await get_embedding(text, use_sbert=use_sbert)
+    embedding = await get_embedding(get_paper_text(paper), use_sbert=use_sbert)
     
     # Cache it
-    await cache_embedding(paper, embedding)
+    await cache_embedding(paper, embedding, use_sbert=use_sbert)
     
     return embedding
 
 
+async def get_or_compute_embeddings(
+    papers: List[Dict],
+    use_sbert: bool = True
+) -> np.ndarray:
+    """
+    Get embeddings for many papers, using cache where available.
+    Cache lookups and writes are one query each, and all cache misses
+    are embedded together in one batched call.
+    
+    Returns:
+        L2-normalized float32 array of shape (len(papers), D); row i embeds
+        papers[i]. Pass prenormalized=True when ranking with it.
+    """
+    model_name = get_embedding_model_name(use_sbert)
+    texts = [get_paper_text(paper) for paper in papers]
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    
+    try:
+        cached = await asyncio.to_thread(_lookup_embeddings, texts, model_name)
+    except Exception as e:
+        print(f"Error loading cached embeddings: {e}")
+        cached = [None] * len(texts)
+    
+    missing = [i for i, embedding in enumerate(cached) if embedding is None]
+    computed = None
+    if missing:
+        computed = await get_embeddings([texts[i] for i in missing], use_sbert=use_sbert)
+        try:
+            await asyncio.to_thread(
+                _store_embeddings,
+                [texts[i] for i in missing],
+                computed,
+                model_name
+            )
+        except Exception as e:
+            print(f"Error caching embeddings: {e}")
+    
+    # Fill one (N, D) matrix directly instead of building a list of vectors
+    dim = computed.shape[1] if computed is not None else len(cached[0])
+    matrix = np.empty((len(texts), dim), dtype=np.float32)
+    for i, embedding in enumerate(cached):
+        if embedding is not None:
+            matrix[i] = embedding
+    if missing:
+        matrix[missing] = computed
+    
+    # Fresh rows are already unit length; this also covers older cache rows and
+    # int8 rounding, so rankers can use a plain dot product
+    return normalize_embeddings(matrix)
+
+
+def _cosine_scores(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Cosine similarity of query against every row of matrix."""
+    # Compute all similarities at once: one (N, D) @ (D,) product
+    # Row norms via einsum avoid materializing the (N, D) matrix * matrix temporary
+    norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix)) * np.sqrt(np.dot(query, query))
+    # Zero-norm vectors score 0.0, as in compute_cosine_similarity
+    return np.divide(
+        matrix @ query,
+        norms,
+        out=np.zeros(len(matrix), dtype=np.float32),
+        where=norms > 0
+    )
+
+
+def _faiss_top_k(query: np.ndarray, matrix: np.ndarray, top_k: int, prenormalized: bool = False) -> tuple:
+    """
+    Exact top-k cosine search with FAISS: inner product over L2-normalized
+    vectors, scored and selected in one call. Returns (scores, indices).
+    """
+    if not prenormalized:
+        matrix = matrix.copy()
+        faiss.normalize_L2(matrix)
+    query = query[None, :].copy()
+    faiss.normalize_L2(query)
+    scores, indices = faiss.knn(query, matrix, top_k, metric=faiss.METRIC_INNER_PRODUCT)
+    return scores[0], indices[0]
+
+
 def rank_by_similarity(
     query_embedding: List[float],
     papers: List[Dict],
-    paper_embeddings: List[List[float]],
-    top_k: int = 10
+    paper_embeddings: Union[np.ndarray, List[List[float]]],
+    top_k: int = 10,
+    prenormalized: bool = False
 ) -> List[Dict]:
     """
     Rank papers by cosine similarity to query embedding.
+    Uses FAISS for scoring and top-k selection when available.
     
     Args:
         query_embedding: Query embedding vector
         papers: List of paper dictionaries
-        paper_embeddings: List of embeddings corresponding to papers
+        paper_embeddings: (N, D) array (or list) of embeddings corresponding to papers
         top_k: Number of top results to return
+        prenormalized: paper_embeddings rows are already unit length (as returned
+            by get_or_compute_embeddings), so only the query is normalized
     
     Returns:
         List of papers sorted by similarity (highest first), with 'score' field added
@@ -230,16 +718,31 @@ def rank_by_similarity(
     if len(papers) != len(paper_embeddings):
         raise ValueError("Papers and embeddings lists must have same length")
     
-    # Compute similarities
-    scored_papers = []
-    for paper, embedding in zip(papers, paper_embeddings):
-        score = compute_cosine_similarity(query_embedding, embedding)
-        paper_copy = paper.copy()
-        paper_copy["score"] = float(score)
-        scored_papers.append(paper_copy)
+    top_k = min(top_k, len(papers))
+    if top_k <= 0:
+        return []
     
-    # Sort by score (descending)
-    ranked = sorted(scored_papers, key=lambda x: x["score"], reverse=True)
+    matrix = np.ascontiguousarray(paper_embeddings, dtype=np.float32)
+    query = np.ascontiguousarray(query_embedding, dtype=np.float32)
+    if FAISS_AVAILABLE:
+        top_scores, top_idx = _faiss_top_k(query, matrix, top_k, prenormalized)
+    else:
+        if prenormalized:
+            # Unit-length rows: cosine is a single matrix-vector product
+            query_norm = np.sqrt(np.dot(query, query))
+            scores = matrix @ (query / query_norm) if query_norm > 0 else np.zeros(len(papers), dtype=np.float32)
+        else:
+            scores = _cosine_scores(query, matrix)
+        # Select the top_k in O(N) with argpartition, then sort only those
+        if top_k < len(papers):
+            top_idx = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            top_idx = np.arange(len(papers))
+        top_idx = top_idx[np.argsort(-scores[top_idx])]
+        top_scores = scores[top_idx]
     
-    return ranked[:top_k]
-
+    # tolist() converts the selected scores to Python floats in one call
+    return [
+        {**papers[i], "score": score}
+        for i, score in zip(top_idx.tolist(), top_scores.tolist())
+    ]
@@ -0,0 +1,38 @@
+import httpx
+from typing import Optional
+
+# HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 keep-alive without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_TIMEOUT = 30.0
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+# Shared client so outbound calls reuse pooled TCP/TLS connections
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared AsyncClient, creating it on first use.
+    The app opens it at startup and closes it at shutdown.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=HTTP_LIMITS,
+            http2=HTTP2_AVAILABLE
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared AsyncClient and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,26 +1,55 @@
 import fitz  # PyMuPDF
-from typing import List
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+# Worker processes for CPU-bound PDF parsing, created on first use
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """
+    Get the shared process pool used to parse PDFs off the event loop.
+    """
+    global _pdf_pool
+    if _pdf_pool is None:
+        # Spawned rather than forked: a fork would copy the server's event loop,
+        # threads and open connections into every worker
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pdf_pool
+
+
+def close_pdf_pool():
+    """
+    Shut down the PDF worker processes, if they were started.
+    """
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(cancel_futures=True)
+        _pdf_pool = None
+
 
 def extract_text_from_pdf(file_path: str) -> str:
     """
     Extract text from a PDF file using PyMuPDF.
     """
     try:
-        doc = fitz.open(file_path)
-        text = ""
-        for page in doc:
-            page_text = page.get_text()
-            text += page_text + "\n"
-        return text.strip()
+        with fitz.open(file_path) as doc:
+            # Join once instead of growing a string page by page
+            parts = [page.get_text("text", sort=False) for page in doc]
+        return "\n".join(parts).strip()
     except Exception as e:
         return f"Error extracting text: {e}"
 
 def extract_texts_from_multiple_pdfs(file_paths: List[str]) -> List[str]:
     """
-    Extract text from multiple PDFs.
+    Extract text from multiple PDFs in parallel worker processes.
     Returns a list of texts corresponding to each PDF.
     """
-    texts = []
-    for path in file_paths:
-        texts.append(extract_text_from_pdf(path))
-    return texts
+    if len(file_paths) < 2:
+        return [extract_text_from_pdf(path) for path in file_paths]
+    return list(get_pdf_pool().map(extract_text_from_pdf, file_paths))
@@ -0,0 +1,71 @@
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Cosine similarity a cached prompt must reach to be reused
+SEMANTIC_CACHE_THRESHOLD = 0.95
+# Entries kept per namespace; the oldest are overwritten first
+SEMANTIC_CACHE_SIZE = 1024
+# Longer texts are truncated by the embedding model, so two different documents
+# with the same opening could look identical; those rely on exact matching only
+SEMANTIC_CACHE_MAX_CHARS = 1000
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour response cache over prompt embeddings.
+    Entries live in separate namespaces (e.g. one per task and style), each a
+    fixed-size ring buffer of unit-length vectors searched with one matrix-vector
+    product.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        maxsize: int = SEMANTIC_CACHE_SIZE
+    ):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._responses: Dict[str, List[Optional[str]]] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, namespace: str, embedding: List[float]) -> Optional[str]:
+        """Return the cached response closest to embedding, if it is similar enough."""
+        query = _unit(embedding)
+        if query is None:
+            return None
+        with self._lock:
+            count = min(self._counts.get(namespace, 0), self.maxsize)
+            if not count:
+                return None
+            scores = self._vectors[namespace][:count] @ query
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                return self._responses[namespace][best]
+        return None
+
+    def add(self, namespace: str, embedding: List[float], response: str):
+        """Store a response under its prompt embedding."""
+        vector = _unit(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            if namespace not in self._vectors:
+                self._vectors[namespace] = np.zeros((self.maxsize, len(vector)), dtype=np.float32)
+                self._responses[namespace] = [None] * self.maxsize
+                self._counts[namespace] = 0
+            slot = self._counts[namespace] % self.maxsize
+            self._vectors[namespace][slot] = vector
+            self._responses[namespace][slot] = response
+            self._counts[namespace] += 1
+
+
+def _unit(embedding: List[float]) -> Optional[np.ndarray]:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.sqrt(np.dot(vector, vector))
+    if norm == 0:
+        return None
+    return vector / norm
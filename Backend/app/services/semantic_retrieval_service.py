@@ -1,13 +1,47 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Union
 import asyncio
+import re
 from app.services.arxiv_service import search_arxiv
 from app.services.semantic_scholar_service import search_semantic_scholar
+from app.utils.lexical_ranking import bm25_prefilter
 from app.services.embedding_service import (
     get_embedding,
-    get_or_compute_embedding,
+    get_or_compute_embeddings,
     rank_by_similarity
 )
 
+# arXiv abstract/PDF links (any scheme, optional query/fragment), capturing the
+# identifier without its version suffix
+_ARXIV_ID_RE = re.compile(
+    r"arxiv\.org/(?:abs|pdf)/([^?#]+?)(?:v\d+)?(?:\.pdf)?/?(?:[?#].*)?$",
+    re.IGNORECASE
+)
+
+
+def _arxiv_id(link: str) -> str:
+    """Extract the version-less arXiv identifier from a link, or '' if it has none."""
+    match = _ARXIV_ID_RE.search(link or "")
+    return match.group(1).lower() if match else ""
+
+
+def _canon_id(paper: Dict) -> str:
+    """
+    Canonical identity of a paper for deduplication: arXiv ID first (from the
+    link or Semantic Scholar's externalIds, without version), so the same paper
+    from both sources collapses; then paperId, then link, then normalized title.
+    """
+    link = paper.get("link") or ""
+    arxiv_id = (paper.get("arxivId") or "").lower() or _arxiv_id(link)
+    if arxiv_id:
+        return f"arxiv_{arxiv_id}"
+    paper_id = (paper.get("paperId") or "").lower()
+    if paper_id:
+        return f"id_{paper_id}"
+    if link:
+        return f"link_{link}"
+    title = " ".join((paper.get("title") or "").lower().split())
+    return f"title_{title[:128]}"
+
 
 async def unified_semantic_search(
     query: str,
@@ -15,8 +49,9 @@ async def unified_semantic_search(
     top_k: int = 20,
     use_sbert: bool = True,
     use_arxiv: bool = True,
-    use_semantic_scholar: bool = True
-) -> List[Dict]:
+    use_semantic_scholar: bool = True,
+    return_query_embedding: bool = False
+) -> Union[List[Dict], Tuple[List[Dict], Optional[List[float]]]]:
     """
     Perform unified semantic search across arXiv and Semantic Scholar.
     
@@ -27,9 +62,13 @@ async def unified_semantic_search(
         use_sbert: Use Sentence-BERT for embeddings (faster, free)
         use_arxiv: Include arXiv results
         use_semantic_scholar: Include Semantic Scholar results
+        return_query_embedding: Also return the query embedding, so callers can
+            reuse it instead of embedding the query again
     
     Returns:
-        List of papers ranked by semantic similarity, with unified schema
+        List of papers ranked by semantic similarity, with unified schema.
+        If return_query_embedding is True, a (papers, query_embedding) tuple;
+        query_embedding is None when no papers were found.
     """
     # Fetch papers from both sources in parallel
     tasks = []
@@ -53,59 +92,35 @@ async def unified_semantic_search(
             all_papers.extend(result)
     
     if not all_papers:
-        return []
+        return ([], None) if return_query_embedding else []
     
-    # Deduplicate by link/paperId
+    # Deduplicate by canonical identifier
     seen = set()
     unique_papers = []
     for paper in all_papers:
-        # Create unique identifier
-        paper_id = paper.get("paperId", "")
-        link = paper.get("link", "")
-        
-        if paper_id:
-            key = f"id_{paper_id}"
-        elif link:
-            key = f"link_{link}"
-        else:
-            # Fallback to title hash
-            key = f"title_{hash(paper.get('title', ''))}"
-        
+        key = _canon_id(paper)
         if key not in seen:
             seen.add(key)
             unique_papers.append(paper)
     
-    # Get query embedding
-    query_embedding = await get_embedding(query, use_sbert=use_sbert)
-    
-    # Get embeddings for all papers (with caching)
-    paper_embeddings = []
-    embedding_tasks = [
-        get_or_compute_embedding(paper, use_sbert=use_sbert) 
-        for paper in unique_papers
-    ]
-    paper_embeddings = await asyncio.gather(*embedding_tasks, return_exceptions=True)
-    
-    # Filter out errors and match papers with embeddings
-    valid_pairs = []
-    for paper, embedding in zip(unique_papers, paper_embeddings):
-        if isinstance(embedding, Exception):
-            print(f"Error computing embedding for {paper.get('title', 'unknown')}: {embedding}")
-            continue
-        valid_pairs.append((paper, embedding))
+    # Drop lexically irrelevant candidates before the expensive embedding step
+    unique_papers = bm25_prefilter(query, unique_papers, keep=2 * top_k)
     
-    if not valid_pairs:
-        return []
-    
-    # Separate papers and embeddings for ranking
-    papers, embeddings = zip(*valid_pairs)
+    # Get query embedding and paper embeddings (with caching) concurrently;
+    # all uncached papers are embedded in a single batched call. Embedding
+    # failures propagate, so the routes report them instead of an empty result
+    query_embedding, paper_embeddings = await asyncio.gather(
+        get_embedding(query, use_sbert=use_sbert),
+        get_or_compute_embeddings(unique_papers, use_sbert=use_sbert)
+    )
     
     # Rank by semantic similarity
     ranked_papers = rank_by_similarity(
         query_embedding,
-        list(papers),
-        list(embeddings),
-        top_k=top_k
+        unique_papers,
+        paper_embeddings,
+        top_k=top_k,
+        prenormalized=True
     )
     
     # Ensure all papers have valid summary strings (safety check)
@@ -119,6 +134,8 @@ async def unified_semantic_search(
         if not isinstance(paper.get("authors"), list):
             paper["authors"] = []
     
+    if return_query_embedding:
+        return ranked_papers, query_embedding
     return ranked_papers
 
 
@@ -1,18 +1,141 @@
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
-from dotenv import load_dotenv
+from app.utils.env import load_env
+from cachetools import TTLCache
 import asyncio
+import hashlib
+import re
+import threading
+import tiktoken
+from typing import AsyncIterator, Optional
+from app.services.embedding_service import get_embedding, SENTENCE_BERT_AVAILABLE
+from app.services.semantic_cache import SemanticCache, SEMANTIC_CACHE_MAX_CHARS
 
-load_dotenv()
+load_env()
 
 # Shared model instance
 llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.3)
 parser = StrOutputParser()
 
+# Per-task output caps: decode time grows with every generated token, so each
+# task gets only the room its answer needs
+MAX_TOKENS = {
+    "summarize_text": 512,
+    "summarize_pdf": 768,
+    "enhance_prompt": 384,
+    "answer_question": 768,
+    "search_query": 96,
+}
+_llms = {
+    task: ChatOpenAI(model=llm.model_name, temperature=llm.temperature, max_tokens=max_tokens)
+    for task, max_tokens in MAX_TOKENS.items()
+}
+
+# Every entry point sends a fully built prompt, so one pass-through template
+# and one chain per task are shared instead of rebuilt per call
+_prompt = PromptTemplate(input_variables=["prompt"], template="{prompt}")
+_chains = {task: _prompt | task_llm | parser for task, task_llm in _llms.items()}
+
+# Exact-match response cache: identical prompts to the same model and
+# temperature reuse the earlier completion for a day instead of calling the API
+_response_cache = TTLCache(maxsize=4096, ttl=86400)
+_response_cache_lock = threading.Lock()
+
+
+def _response_cache_key(prompt_text: str, task: str) -> bytes:
+    task_llm = _llms[task]
+    key = f"{task_llm.model_name}\x00{task_llm.temperature}\x00{task_llm.max_tokens}\x00{prompt_text}"
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+
+# Near-duplicate response cache for short prompts to enhance (rewordings,
+# whitespace edits); looked up only after an exact-match miss. Summaries are not
+# shared this way: sentence embeddings score a paragraph and its negation (or a
+# changed number) as near-identical, so one text would get another's summary.
+# It needs the local SBERT model, so a miss never costs a paid embedding call.
+_semantic_cache = SemanticCache()
+SEMANTIC_CACHE_ENABLED = SENTENCE_BERT_AVAILABLE
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+_NEGATION_RE = re.compile(r"\b(?:not|no|never|none|nor|neither|without|cannot)\b|n't\b", re.IGNORECASE)
+
+
+def _semantic_namespace(task: str, text: str) -> str:
+    """
+    Responses are only shared between inputs of the same task and requested
+    style that contain the same numbers and the same negations.
+    """
+    instructions = detect_user_instructions(text)
+    style = ",".join(name for name, wanted in instructions.items() if wanted)
+    numbers = ",".join(_NUMBER_RE.findall(text))
+    negations = ",".join(match.lower() for match in _NEGATION_RE.findall(text))
+    return f"{task}:{style}:{numbers}:{negations}"
+
+
+async def _ainvoke(prompt_text: str, task: str, semantic_text: Optional[str] = None) -> str:
+    """
+    Run the task's chain on a prompt, serving repeats from the response cache.
+    With semantic_text set, an exact-match miss also checks the
+    semantic cache using an embedding of semantic_text (the raw user input).
+    """
+    key = _response_cache_key(prompt_text, task)
+    with _response_cache_lock:
+        cached = _response_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    embedding = None
+    if SEMANTIC_CACHE_ENABLED and semantic_text is not None and len(semantic_text) <= SEMANTIC_CACHE_MAX_CHARS:
+        namespace = _semantic_namespace(task, semantic_text)
+        try:
+            embedding = await get_embedding(semantic_text)
+        except Exception as e:
+            print(f"Error embedding prompt for semantic cache: {e}")
+        if embedding is not None:
+            cached = _semantic_cache.lookup(namespace, embedding)
+            if cached is not None:
+                return cached
+    
+    result = await _chains[task].ainvoke({"prompt": prompt_text})
+    with _response_cache_lock:
+        _response_cache[key] = result
+    if embedding is not None:
+        _semantic_cache.add(namespace, embedding, result)
+    return result
+
+
+async def _astream(prompt_text: str, task: str) -> AsyncIterator[str]:
+    """
+    Stream the task chain's output token chunks as they are generated.
+    A cached response is yielded in one piece; a completed stream is cached.
+    """
+    key = _response_cache_key(prompt_text, task)
+    with _response_cache_lock:
+        cached = _response_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+    
+    chunks = []
+    async for chunk in _chains[task].astream({"prompt": prompt_text}):
+        chunks.append(chunk)
+        yield chunk
+    with _response_cache_lock:
+        _response_cache[key] = "".join(chunks)
+
 # ---------------------------
 # 0️⃣ Utility: Detect user instructions
 # ---------------------------
+INSTRUCTION_SCAN_CHARS = 4096
+_INSTRUCTION_KEYWORDS = {
+    "short": "concise", "concise": "concise", "brief": "concise",
+    "long": "detailed", "detailed": "detailed", "elaborate": "detailed",
+    "bullet": "bullet_points", "points": "bullet_points",
+    "step": "step_by_step",
+    "example": "examples",
+}
+_INSTRUCTION_RE = re.compile("|".join(_INSTRUCTION_KEYWORDS), re.IGNORECASE)
+
 def detect_user_instructions(prompt: str) -> dict:
     """
     Detects if user wants short/long, bullet points, step-by-step, examples, etc.
@@ -26,17 +149,10 @@ def detect_user_instructions(prompt: str) -> dict:
         "examples": False
     }
 
-    lower = prompt.lower()
-    if "short" in lower or "concise" in lower or "brief" in lower:
-        instructions["concise"] = True
-    if "long" in lower or "detailed" in lower or "elaborate" in lower:
-        instructions["detailed"] = True
-    if "bullet" in lower or "points" in lower:
-        instructions["bullet_points"] = True
-    if "step" in lower or "step by step" in lower:
-        instructions["step_by_step"] = True
-    if "example" in lower or "examples" in lower:
-        instructions["examples"] = True
+    # One case-insensitive pass over the head of the prompt: instructions sit at
+    # the start, and scanning a whole pasted paper (plus a lowercased copy) is wasted work
+    for match in _INSTRUCTION_RE.finditer(prompt, 0, INSTRUCTION_SCAN_CHARS):
+        instructions[_INSTRUCTION_KEYWORDS[match.group(0).lower()]] = True
 
     return instructions
 
@@ -72,75 +188,146 @@ def adaptive_prompt(user_prompt: str, base_instruction: str = "") -> str:
 # ---------------------------
 # 2️⃣ Summarize Text
 # ---------------------------
-def summarize_text(text: str) -> str:
-    prompt_text = adaptive_prompt(
-        text,
-        base_instruction=(
-            "Summarize complex scholarly material clearly, capturing objectives, "
-            "key findings, technical terms, and logical flow. Avoid repetition or personal opinion."
-        )
-    )
-    prompt = PromptTemplate(input_variables=["prompt"], template="{prompt}")
-    chain = prompt | llm | parser
+SUMMARIZE_TEXT_INSTRUCTION = (
+    "Summarize complex scholarly material clearly, capturing objectives, "
+    "key findings, technical terms, and logical flow. Avoid repetition or personal opinion. "
+    "Keep it under 350 words."
+)
+
+async def asummarize_text(text: str) -> str:
+    """Summarize text; awaits the LLM without blocking the event loop."""
+    prompt_text = adaptive_prompt(text, base_instruction=SUMMARIZE_TEXT_INSTRUCTION)
     try:
-        return chain.invoke({"prompt": prompt_text})
+        return await _ainvoke(prompt_text, "summarize_text")
     except Exception as e:
         return f"Error generating summary: {e}"
 
 # ---------------------------
 # 3️⃣ Summarize PDF
 # ---------------------------
-def summarize_pdf(text: str) -> str:
-    prompt_text = adaptive_prompt(
-        text,
-        base_instruction=(
-            "Summarize the PDF content capturing objectives, methods, results, "
-            "key findings, and conclusions. Preserve technical terms and maintain formal tone."
-        )
-    )
-    prompt = PromptTemplate(input_variables=["prompt"], template="{prompt}")
-    chain = prompt | llm | parser
+SUMMARIZE_PDF_INSTRUCTION = (
+    "Summarize the PDF content capturing objectives, methods, results, "
+    "key findings, and conclusions. Preserve technical terms and maintain formal tone. "
+    "Keep it under 500 words."
+)
+
+async def asummarize_pdf(text: str) -> str:
+    """Summarize a PDF's text; awaits the LLM without blocking the event loop."""
+    prompt_text = adaptive_prompt(text, base_instruction=SUMMARIZE_PDF_INSTRUCTION)
     try:
-        return chain.invoke({"prompt": prompt_text})
+        return await _ainvoke(prompt_text, "summarize_pdf")
     except Exception as e:
         return f"Error summarizing PDF: {e}"
 
 # ---------------------------
 # 4️⃣ Enhance Prompt
 # ---------------------------
-def enhance_prompt(prompt_text: str) -> str:
-    prompt_text = adaptive_prompt(
-        prompt_text,
-        base_instruction=(
-            "Rewrite the user's prompt for clarity, structure, and specificity. "
-            "Add instructions for better AI responses if missing."
-        )
-    )
-    prompt = PromptTemplate(input_variables=["prompt"], template="{prompt}")
-    chain = prompt | llm | parser
+ENHANCE_PROMPT_INSTRUCTION = (
+    "Rewrite the user's prompt for clarity, structure, and specificity. "
+    "Add instructions for better AI responses if missing. Keep it under 250 words."
+)
+
+async def aenhance_prompt(prompt_text: str) -> str:
+    """Rewrite a prompt for clarity; awaits the LLM without blocking the event loop."""
+    user_prompt = prompt_text
+    prompt_text = adaptive_prompt(prompt_text, base_instruction=ENHANCE_PROMPT_INSTRUCTION)
     try:
-        return chain.invoke({"prompt": prompt_text})
+        return await _ainvoke(prompt_text, "enhance_prompt", semantic_text=user_prompt)
     except Exception as e:
         return f"Error enhancing prompt: {e}"
 
 # ---------------------------
 # 5️⃣ Answer Question (Multi-PDF)
 # ---------------------------
-def answer_question(pdf_texts: list, question: str, conversation_history: str) -> str:
-    combined_texts = ""
-    for i, text in enumerate(pdf_texts, 1):
-        combined_texts += f"[PDF {i}]\n{text}\n\n"
-    
-    base_instruction = (
-        "Use the following PDFs and conversation history to answer the user's question. "
-        "Include bullet points for methodology or technical steps and cite PDF numbers where relevant."
+ANSWER_QUESTION_INSTRUCTION = (
+    "Use the following PDFs and conversation history to answer the user's question. "
+    "Include bullet points for methodology or technical steps and cite PDF numbers where relevant. "
+    "Keep the answer under 500 words."
+)
+
+# gpt-3.5-turbo's context window; PDFs are truncated so the prompt plus the
+# answer always fit in it
+CONTEXT_WINDOW_TOKENS = 16385
+# Most of the window the conversation history may take; its oldest turns are cut first
+HISTORY_MAX_TOKENS = CONTEXT_WINDOW_TOKENS // 4
+# Room left unused for chat message framing and token counts that shift where
+# separately counted pieces are joined
+CONTEXT_SAFETY_MARGIN = 256
+# Upper bound on characters per token, used to cut very long texts before
+# tokenizing them so a huge PDF is never encoded in full
+_MAX_CHARS_PER_TOKEN = 8
+_encoding = None
+
+
+def _get_encoding():
+    """Load the model's tokenizer on first use; None if it can't be loaded (e.g. offline)."""
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.encoding_for_model(llm.model_name)
+        except Exception as e:
+            print(f"Warning: tiktoken encoding not available, counting UTF-8 bytes as tokens: {e}")
+            _encoding = False
+    return _encoding or None
+
+
+def _count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        # A byte-level BPE never produces more tokens than UTF-8 bytes, so this
+        # can't underestimate (unlike a characters-per-token guess for non-English text)
+        return len(text.encode("utf-8"))
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _truncate_tokens(text: str, max_tokens: int, keep_end: bool = False) -> str:
+    """Cut text down to at most max_tokens tokens, from the end (or the start if keep_end)."""
+    if max_tokens <= 0:
+        return ""
+    max_chars = max_tokens * _MAX_CHARS_PER_TOKEN
+    text = text[-max_chars:] if keep_end else text[:max_chars]
+    encoding = _get_encoding()
+    if encoding is None:
+        data = text.encode("utf-8")
+        data = data[-max_tokens:] if keep_end else data[:max_tokens]
+        return data.decode("utf-8", errors="ignore")
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[-max_tokens:] if keep_end else tokens[:max_tokens])
+
+
+def _answer_question_prompt(pdf_texts: list, question: str, conversation_history: str) -> str:
+    """
+    Build the answer_question prompt: the PDFs, the conversation history (its
+    latest HISTORY_MAX_TOKENS) and the question. The PDFs share what is left of
+    the context window equally, after the answer, the PDF headers and separators
+    and a safety margin.
+    """
+    history = _truncate_tokens(conversation_history, HISTORY_MAX_TOKENS, keep_end=True)
+    history = f"Conversation history:\n{history}" if history else ""
+    fixed_prompt = adaptive_prompt(question, base_instruction=f"{ANSWER_QUESTION_INSTRUCTION}\n\n{history}")
+    headers = "".join(f"[PDF {i}]\n\n\n" for i in range(1, len(pdf_texts) + 1))
+    budget = (
+        CONTEXT_WINDOW_TOKENS - MAX_TOKENS["answer_question"] - CONTEXT_SAFETY_MARGIN
+        - _count_tokens(fixed_prompt) - _count_tokens(headers)
     )
-    prompt_text = adaptive_prompt(question, base_instruction=base_instruction)
+    if pdf_texts and budget < len(pdf_texts):
+        raise ValueError("the question is too long to answer within the model's context window")
+    per_pdf = budget // max(len(pdf_texts), 1)
     
-    prompt = PromptTemplate(input_variables=["prompt"], template="{prompt}")
-    chain = prompt | llm | parser
+    combined_texts = "\n\n".join(
+        f"[PDF {i}]\n{_truncate_tokens(text, per_pdf)}" for i, text in enumerate(pdf_texts, 1)
+    )
+    sections = [ANSWER_QUESTION_INSTRUCTION, combined_texts, history]
+    return adaptive_prompt(question, base_instruction="\n\n".join(section for section in sections if section))
+
+async def aanswer_question(pdf_texts: list, question: str, conversation_history: str) -> str:
+    """Answer a question about the PDFs; awaits the LLM without blocking the event loop."""
     try:
-        return chain.invoke({"prompt": prompt_text})
+        # Tokenizing the PDFs is CPU work, so it runs off the event loop
+        prompt_text = await asyncio.to_thread(_answer_question_prompt, pdf_texts, question, conversation_history)
+        return await _ainvoke(prompt_text, "answer_question")
     except Exception as e:
         return f"Error answering question: {e}"
 
@@ -150,6 +337,7 @@ def answer_question(pdf_texts: list, question: str, conversation_history: str) -
 async def generate_search_query(text: str) -> list[str]:
     """
     Generate multiple concise search keywords/queries from user-provided text.
+    Repeated texts are answered from the response cache.
     """
     base_instruction = (
         "Generate 3-5 concise search queries focusing on technical keywords, concepts, "
@@ -157,12 +345,26 @@ async def generate_search_query(text: str) -> list[str]:
     )
     prompt_text = adaptive_prompt(text, base_instruction=base_instruction)
     
-    prompt = PromptTemplate(input_variables=["prompt"], template="{prompt}")
-    chain = prompt | llm | parser
     try:
-        result = chain.invoke({"prompt": prompt_text})
-        queries = [q.strip() for q in result.split(",") if q.strip()]
-        return queries
+        result = await _ainvoke(prompt_text, "search_query")
+        return [q.strip() for q in result.split(",") if q.strip()]
     except Exception as e:
         print(f"Error generating search queries: {e}")
         return []
+
+# ---------------------------
+# 7️⃣ Streaming variants
+# ---------------------------
+def astream_summarize_text(text: str) -> AsyncIterator[str]:
+    """Stream asummarize_text's output as it is generated."""
+    return _astream(adaptive_prompt(text, base_instruction=SUMMARIZE_TEXT_INSTRUCTION), "summarize_text")
+
+def astream_enhance_prompt(prompt_text: str) -> AsyncIterator[str]:
+    """Stream aenhance_prompt's output as it is generated."""
+    return _astream(adaptive_prompt(prompt_text, base_instruction=ENHANCE_PROMPT_INSTRUCTION), "enhance_prompt")
+
+async def astream_answer_question(pdf_texts: list, question: str, conversation_history: str) -> AsyncIterator[str]:
+    """Stream aanswer_question's output as it is generated."""
+    prompt_text = await asyncio.to_thread(_answer_question_prompt, pdf_texts, question, conversation_history)
+    async for chunk in _astream(prompt_text, "answer_question"):
+        yield chunk
@@ -0,0 +1,12 @@
+import functools
+from dotenv import load_dotenv
+
+
+@functools.lru_cache(maxsize=None)
+def load_env() -> bool:
+    """
+    Load the .env file into the process environment once per process.
+    Variables already set in the environment (Docker, systemd) take precedence,
+    and a missing .env file is not an error.
+    """
+    return load_dotenv()
@@ -0,0 +1,94 @@
+import zlib
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Largest request body accepted after decompression, so a small gzip bomb
+# can't expand into gigabytes
+MAX_DECOMPRESSED_BODY = 64 * 1024 * 1024
+# Largest compressed body buffered before decompression starts
+MAX_COMPRESSED_BODY = 16 * 1024 * 1024
+
+
+class GZipRequestMiddleware:
+    """
+    Decompress request bodies sent with `Content-Encoding: gzip` before they reach
+    the routes (Starlette's GZipMiddleware only compresses responses).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_size: int = MAX_DECOMPRESSED_BODY,
+        max_compressed_size: int = MAX_COMPRESSED_BODY
+    ):
+        self.app = app
+        self.max_size = max_size
+        self.max_compressed_size = max_compressed_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = [(name, value) for name, value in scope["headers"] if name != b"content-encoding"]
+        encodings = [
+            value.strip().lower() for name, value in scope["headers"] if name == b"content-encoding"
+        ]
+        if encodings != [b"gzip"]:
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        received = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            received += len(chunk)
+            if received > self.max_compressed_size:
+                await PlainTextResponse("Request body too large.", status_code=413)(scope, receive, send)
+                return
+            chunks.append(chunk)
+            more_body = message.get("more_body", False)
+
+        # A body may hold several gzip members back to back (e.g. concatenated
+        # files); they are decompressed in turn under one size limit
+        data = b"".join(chunks)
+        parts = []
+        remaining = self.max_size
+        while True:
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            try:
+                # One byte over the limit, since a max_length of 0 means unlimited
+                part = decompressor.decompress(data, remaining + 1)
+            except zlib.error:
+                await PlainTextResponse("Invalid gzip request body.", status_code=400)(scope, receive, send)
+                return
+            if len(part) > remaining or decompressor.unconsumed_tail:
+                await PlainTextResponse("Request body too large.", status_code=413)(scope, receive, send)
+                return
+            # A stream cut short decompresses without error but never reaches its end marker
+            if not decompressor.eof:
+                await PlainTextResponse("Invalid gzip request body.", status_code=400)(scope, receive, send)
+                return
+            parts.append(part)
+            remaining -= len(part)
+            data = decompressor.unused_data
+            if not data:
+                break
+        body = b"".join(parts)
+
+        headers = [(name, value) for name, value in headers if name != b"content-length"]
+        headers.append((b"content-length", str(len(body)).encode()))
+        scope = {**scope, "headers": headers}
+        sent = False
+
+        async def receive_decompressed() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, receive_decompressed, send)
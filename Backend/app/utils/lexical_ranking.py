@@ -0,0 +1,53 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokenizer used for lexical scoring.
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+
+def bm25_scores(query: str, documents: List[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """
+    Score documents against a query with Okapi BM25.
+    """
+    doc_terms = [Counter(tokenize(doc)) for doc in documents]
+    doc_lengths = [sum(terms.values()) for terms in doc_terms]
+    n_docs = len(documents)
+    avg_length = (sum(doc_lengths) / n_docs) if n_docs else 0.0
+    avg_length = avg_length or 1.0
+
+    scores = [0.0] * n_docs
+    for term in set(tokenize(query)):
+        doc_freq = sum(1 for terms in doc_terms if term in terms)
+        if doc_freq == 0:
+            continue
+        idf = math.log((n_docs - doc_freq + 0.5) / (doc_freq + 0.5) + 1.0)
+        for i, terms in enumerate(doc_terms):
+            tf = terms.get(term)
+            if tf:
+                norm = k1 * (1 - b + b * doc_lengths[i] / avg_length)
+                scores[i] += idf * tf * (k1 + 1) / (tf + norm)
+
+    return scores
+
+
+def bm25_prefilter(query: str, papers: List[Dict], keep: int) -> List[Dict]:
+    """
+    Keep the `keep` papers whose title + abstract score highest against the query.
+    Cheap lexical pass used to trim candidates before embedding them.
+    Papers are returned in their original order.
+    """
+    if len(papers) <= keep:
+        return papers
+
+    documents = [f"{paper.get('title') or ''} {paper.get('summary') or ''}" for paper in papers]
+    scores = bm25_scores(query, documents)
+    top = sorted(range(len(papers)), key=lambda i: scores[i], reverse=True)[:keep]
+    return [papers[i] for i in sorted(top)]
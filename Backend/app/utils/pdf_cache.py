@@ -0,0 +1,96 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import orjson
+
+# Parsed document text keyed by a hash of the uploaded bytes, so re-uploading the
+# same file (common in a chat session) skips parsing entirely
+PDF_CACHE_DIR = Path(__file__).parent.parent.parent / "cache" / "pdf"
+PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+PDF_CACHE_DB_PATH = PDF_CACHE_DIR / "documents.sqlite3"
+# Least recently used entries are evicted once stored values exceed this size
+PDF_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+_cache_db = None
+_cache_db_lock = threading.Lock()
+# Running total of stored value sizes, so inserts don't have to sum the table
+_cache_size = 0
+
+
+def pdf_cache_hasher():
+    """Incremental hasher producing pdf_cache_key digests, for files read in chunks."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def pdf_cache_key(file_bytes: bytes) -> bytes:
+    """Content hash of an uploaded file."""
+    hasher = pdf_cache_hasher()
+    hasher.update(file_bytes)
+    return hasher.digest()
+
+
+def _get_cache_db() -> sqlite3.Connection:
+    """Open the document cache database on first use."""
+    global _cache_db, _cache_size
+    if _cache_db is None:
+        _cache_db = sqlite3.connect(PDF_CACHE_DB_PATH, check_same_thread=False)
+        _cache_db.execute(
+            "CREATE TABLE IF NOT EXISTS documents "
+            "(key BLOB NOT NULL, kind TEXT NOT NULL, value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (key, kind))"
+        )
+        _cache_db.execute("CREATE INDEX IF NOT EXISTS documents_accessed ON documents (accessed)")
+        _cache_db.commit()
+        _cache_size = _cache_db.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+    return _cache_db
+
+
+def get_cached_document(key: bytes, kind: str) -> Optional[Any]:
+    """
+    Get a cached parse result. kind separates results of different parsers
+    for the same bytes (e.g. plain text vs. text with formulas).
+    """
+    with _cache_db_lock:
+        db = _get_cache_db()
+        row = db.execute(
+            "SELECT value FROM documents WHERE key = ? AND kind = ?", (key, kind)
+        ).fetchone()
+        if row is None:
+            return None
+        db.execute(
+            "UPDATE documents SET accessed = ? WHERE key = ? AND kind = ?", (time.time(), key, kind)
+        )
+        db.commit()
+    return orjson.loads(row[0])
+
+
+def set_cached_document(key: bytes, kind: str, value: Any):
+    """Store a parse result, evicting the least recently used entries past the size limit."""
+    global _cache_size
+    data = orjson.dumps(value)
+    with _cache_db_lock:
+        db = _get_cache_db()
+        replaced = db.execute(
+            "SELECT size FROM documents WHERE key = ? AND kind = ?", (key, kind)
+        ).fetchone()
+        db.execute(
+            "INSERT OR REPLACE INTO documents (key, kind, value, size, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, kind, data, len(data), time.time())
+        )
+        _cache_size += len(data) - (replaced[0] if replaced else 0)
+        if _cache_size > PDF_CACHE_MAX_BYTES:
+            excess = _cache_size - PDF_CACHE_MAX_BYTES
+            freed = 0
+            stale = []
+            for rowid, size in db.execute("SELECT rowid, size FROM documents ORDER BY accessed"):
+                stale.append((rowid,))
+                freed += size
+                if freed >= excess:
+                    break
+            db.executemany("DELETE FROM documents WHERE rowid = ?", stale)
+            _cache_size -= freed
+        db.commit()
@@ -1,66 +1,148 @@
 import fitz  # PyMuPDF
-import docx
+import re
+import zipfile
 from io import BytesIO
 from lxml import etree
-from typing import Dict
+from typing import Dict, Union
+from app.utils.pdf_cache import pdf_cache_key, get_cached_document, set_cached_document
 
+# Characters that mark a line as a likely math expression
+_MATH_RE = re.compile(r"[∑∫√≈≤≥^_πθ∞=]")
+# Office MathML (OMML) formula element
+_OMML_TAG = "{http://schemas.openxmlformats.org/officeDocument/2006/math}oMath"
+# WordprocessingML elements that make up paragraph text; tabs and breaks map to
+# the same characters python-docx's Paragraph.text used
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P_TAG = _W_NS + "p"
+_W_T_TAG = _W_NS + "t"
+_W_TYPE_ATTR = _W_NS + "type"
+_W_RUN_CHARS = {_W_NS + "tab": "\t", _W_NS + "ptab": "\t", _W_NS + "cr": "\n", _W_NS + "noBreakHyphen": "-"}
+_W_BR_TAG = _W_NS + "br"
+# Alternate content fallback (e.g. the VML copy of a textbox), a duplicate of its mc:Choice
+_MC_FALLBACK_TAG = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_DOCX_BODY = "word/document.xml"
 
-def parse_pdf_with_formulas(file_bytes: bytes) -> Dict[str, str]:
+
+def parse_pdf_with_formulas(source: Union[str, bytes]) -> Dict[str, str]:
     """
     Extract text and approximate mathematical formulas from a PDF.
+    Accepts a file path (read from disk by MuPDF, no in-memory copy) or raw bytes.
     Note: Real math extraction depends on how the PDF was created.
     """
-    doc = fitz.open(stream=file_bytes, filetype="pdf")
-    text_content = ""
+    if isinstance(source, (bytes, bytearray)):
+        doc = fitz.open(stream=source, filetype="pdf")
+    else:
+        doc = fitz.open(source)
+    text_chunks = []
     formulas = []
 
     for page in doc:
-        text = page.get_text("text")
-        text_content += text
+        # Text blocks come straight from MuPDF's layout; image blocks are skipped
+        for _, _, _, _, text, _, block_type in page.get_text("blocks", sort=False):
+            if block_type != 0:
+                continue
+            text_chunks.append(text)
 
-        # Detect likely math expressions (heuristic)
-        lines = text.splitlines()
-        for line in lines:
-            if any(sym in line for sym in ["∑", "∫", "√", "≈", "≤", "≥", "^", "_", "π", "θ", "∞", "="]):
-                formulas.append(line.strip())
+            # Detect likely math expressions (heuristic); most blocks have none,
+            # so check the whole block once before splitting it into lines
+            if not _MATH_RE.search(text):
+                continue
+            for line in text.splitlines():
+                if _MATH_RE.search(line):
+                    formulas.append(line.strip())
 
     doc.close()
-    return {"text": text_content.strip(), "formulas": "\n".join(formulas)}
+    return {"text": "".join(text_chunks).strip(), "formulas": "\n".join(formulas)}
 
 
-def parse_docx_with_formulas(file_bytes: bytes) -> Dict[str, str]:
+def parse_docx_with_formulas(source: Union[str, bytes]) -> Dict[str, str]:
     """
     Extract text and math formulas (OMML/MathML) from DOCX files.
+    Accepts a file path or raw bytes.
     """
-    text_content = ""
+    paragraphs = []
     formulas = []
 
-    doc = docx.Document(BytesIO(file_bytes))
-    for para in doc.paragraphs:
-        text_content += para.text + "\n"
-
-    # Parse raw XML for math content
-    zip_stream = BytesIO(file_bytes)
-    import zipfile
-    with zipfile.ZipFile(zip_stream) as z:
+    with zipfile.ZipFile(BytesIO(source) if isinstance(source, (bytes, bytearray)) else source) as z:
         for name in z.namelist():
-            if name.startswith("word/") and name.endswith(".xml"):
-                xml = z.read(name)
-                tree = etree.fromstring(xml)
-                # Search for Office MathML (OMML) nodes
-                for math in tree.findall(".//{http://schemas.openxmlformats.org/officeDocument/2006/math}oMath"):
-                    formulas.append(etree.tostring(math, encoding="unicode"))
+            if not (name.startswith("word/") and name.endswith(".xml")):
+                continue
+            # The body contributes paragraph text and formulas; other parts
+            # (headers, footnotes, ...) only formulas
+            _parse_docx_part(z.read(name), paragraphs if name == _DOCX_BODY else None, formulas)
+
+    return {"text": "\n".join(paragraphs).strip(), "formulas": "\n".join(formulas)}
 
-    return {"text": text_content.strip(), "formulas": "\n".join(formulas)}
+
+def _parse_docx_part(xml: bytes, paragraphs, formulas):
+    """
+    Collect the formulas of one DOCX XML part in a single streaming pass, and its
+    paragraph texts too unless paragraphs is None. Paragraphs nest (a textbox
+    paragraph sits inside a run of its anchor paragraph), so each open paragraph
+    keeps its own buffer; mc:Fallback content duplicates mc:Choice and is skipped.
+    """
+    tags = [_OMML_TAG, _MC_FALLBACK_TAG]
+    if paragraphs is not None:
+        tags += [_W_P_TAG, _W_T_TAG, _W_BR_TAG, *_W_RUN_CHARS]
+    open_paragraphs = []
+    fallback_depth = 0
+
+    for event, elem in etree.iterparse(BytesIO(xml), events=("start", "end"), tag=tags):
+        if elem.tag == _MC_FALLBACK_TAG:
+            fallback_depth += 1 if event == "start" else -1
+            if event == "end":
+                _free(elem)
+            continue
+        if fallback_depth:
+            continue
+        if elem.tag == _W_P_TAG:
+            if event == "start":
+                open_paragraphs.append([])
+            else:
+                paragraphs.append("".join(open_paragraphs.pop()))
+                _free(elem)
+            continue
+        if event == "start":
+            continue
+        if elem.tag == _OMML_TAG:
+            formulas.append(etree.tostring(elem, encoding="unicode"))
+            _free(elem)
+        elif open_paragraphs:
+            if elem.tag == _W_T_TAG:
+                open_paragraphs[-1].append(elem.text or "")
+            elif elem.tag == _W_BR_TAG:
+                # Page and column breaks add no text, as in python-docx
+                if elem.get(_W_TYPE_ATTR, "textWrapping") == "textWrapping":
+                    open_paragraphs[-1].append("\n")
+            else:
+                open_paragraphs[-1].append(_W_RUN_CHARS[elem.tag])
+
+
+def _free(elem):
+    """
+    Release a fully handled iterparse element and the siblings parsed before it.
+    """
+    elem.clear()
+    while elem.getprevious() is not None:
+        del elem.getparent()[0]
 
 
 def extract_text_and_formulas(filename: str, file_bytes: bytes) -> Dict[str, str]:
     """
     Decide which parser to use based on file type.
+    Results are cached by content hash, so a re-uploaded file is not parsed again.
     """
     if filename.lower().endswith(".pdf"):
-        return parse_pdf_with_formulas(file_bytes)
+        parser, kind = parse_pdf_with_formulas, "pdf_formulas"
     elif filename.lower().endswith(".docx"):
-        return parse_docx_with_formulas(file_bytes)
+        parser, kind = parse_docx_with_formulas, "docx_formulas"
     else:
         raise ValueError("Unsupported file type. Only PDF and DOCX are supported.")
+
+    key = pdf_cache_key(file_bytes)
+    cached = get_cached_document(key, kind)
+    if cached is not None:
+        return cached
+    result = parser(file_bytes)
+    set_cached_document(key, kind, result)
+    return result
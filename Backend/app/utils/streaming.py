@@ -0,0 +1,18 @@
+import orjson
+from typing import AsyncIterator
+
+
+async def sse_events(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """
+    Wrap text chunks as Server-Sent Events. Each chunk is sent as a JSON
+    string so embedded newlines survive; the stream ends with an "end" event,
+    or an "error" event if generation fails part-way.
+    """
+    try:
+        async for chunk in chunks:
+            if chunk:
+                yield b"data: " + orjson.dumps(chunk) + b"\n\n"
+    except Exception as e:
+        yield b"event: error\ndata: " + orjson.dumps(str(e)) + b"\n\n"
+        return
+    yield b"event: end\ndata: \"\"\n\n"
@@ -1,6 +1,19 @@
+import codecs
 import re
 import unicodedata
 
+# Patterns are compiled once at import and applied in order by clean_extracted_text
+_PAGE_NUMBER_RE = re.compile(r"Page\s*\d+(\s*of\s*\d+)?", re.IGNORECASE)
+_STRAY_NUMBER_RE = re.compile(r"\n?\s*\d+\s*\n")
+_MULTI_NEWLINE_RE = re.compile(r"\n+")
+_HYPHEN_BREAK_RE = re.compile(r"(\w+)-\n(\w+)")
+_SINGLE_NEWLINE_RE = re.compile(r"(?<!\n)\n(?!\n)")
+
+# Codec error handler that turns each run of non-ASCII characters into one space.
+# Bullet symbols (•·●▪■□▶►) are all non-ASCII, so this covers them too.
+codecs.register_error("cleanup_space", lambda err: (" ", err.end))
+_REFERENCES_RE = re.compile(r"(References|Bibliography)[\s\S]*$", re.IGNORECASE)
+
 def clean_extracted_text(text: str) -> str:
     """
     Clean and normalize extracted text from PDFs or DOCX files.
@@ -11,29 +24,31 @@ def clean_extracted_text(text: str) -> str:
     text = unicodedata.normalize("NFKC", text)
 
     # Removing common artifacts such as headers/footers, page numbers
-    text = re.sub(r"Page\s*\d+(\s*of\s*\d+)?", " ", text, flags=re.IGNORECASE)
-    text = re.sub(r"\n?\s*\d+\s*\n", " ", text)  # stray numbers (page numbers, footnotes)
+    text = _PAGE_NUMBER_RE.sub(" ", text)
+    text = _STRAY_NUMBER_RE.sub(" ", text)  # stray numbers (page numbers, footnotes)
 
     # Removing multiple newlines and replace with one
-    text = re.sub(r"\n+", "\n", text)
+    text = _MULTI_NEWLINE_RE.sub("\n", text)
 
     # Removing hyphenation across line breaks (e.g., "informa-\ntion" → "information")
-    text = re.sub(r"(\w+)-\n(\w+)", r"\1\2", text)
+    text = _HYPHEN_BREAK_RE.sub(r"\1\2", text)
 
     # Replacing newlines within paragraphs with spaces
-    text = re.sub(r"(?<!\n)\n(?!\n)", " ", text)
+    text = _SINGLE_NEWLINE_RE.sub(" ", text)
 
-    # Removing unwanted symbols or control characters
-    text = re.sub(r"[^\x00-\x7F]+", " ", text)  # non-ASCII chars
-    text = re.sub(r"[•·●▪■□▶►]", " ", text)    # bullet symbols
+    # Removing unwanted symbols or control characters (non-ASCII, including bullets);
+    # the ASCII codec scans in C and only calls the handler once per non-ASCII run
+    if not text.isascii():
+        text = text.encode("ascii", errors="cleanup_space").decode("ascii")
 
-    # Removing excessive whitespace
-    text = re.sub(r"\s+", " ", text)
+    # Removing excessive whitespace; the text is ASCII by now, where str.split()
+    # splits on exactly the characters \s matches, and it beats a regex substitution
+    text = " ".join(text.split())
 
     # Removing references section if not needed (optional)
-    text = re.sub(r"(References|Bibliography)[\s\S]*$", "", text, flags=re.IGNORECASE)
+    text = _REFERENCES_RE.sub("", text)
 
     # Strip leading
     text = text.strip()
 
-    return text
\ No newline at end of file
+    return text
@@ -1,10 +1,32 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from app.api.pdf_routes import router as pdf_router
 from app.api.citation_routes import router as citation_router
 from app.api.query_routes import router as query_router
 from app.api.auth_routes import router as auth_router
 from app.api.semantic_routes import router as semantic_router
-app = FastAPI()
+from app.services.http import get_http_client, close_http_client
+from app.services.pdf_service import close_pdf_pool
+from app.utils.gzip_request import GZipRequestMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared outbound HTTP client up front and close its pool on shutdown,
+    # along with the PDF worker processes
+    get_http_client()
+    yield
+    await close_http_client()
+    close_pdf_pool()
+
+# orjson serializes the large paper lists (and numpy scores) much faster than json
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+# Large JSON bodies (PDF texts, paper lists) travel gzip-compressed both ways;
+# small ones aren't worth the CPU, and SSE streams are never compressed
+app.add_middleware(GZipMiddleware, minimum_size=4096, compresslevel=1)
+app.add_middleware(GZipRequestMiddleware)
 app.include_router(pdf_router)
 app.include_router(citation_router)
 app.include_router(query_router)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests import the backend the way main.py does, as the top-level `app` package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+os.environ.setdefault("OPENAI_API_KEY", "test")
@@ -0,0 +1,57 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import citation_routes
+from app.schemas.paper import MAX_CITATION_BATCH_TEXTS
+
+
+def _client(monkeypatch, delays=None):
+    async def fake_search(query, **kwargs):
+        # Earlier texts finish later, so gather order and completion order differ
+        await asyncio.sleep((delays or {}).get(query, 0))
+        return [{
+            "title": query,
+            "summary": "abstract",
+            "authors": [],
+            "published": "2024-01-01",
+            "link": "https://arxiv.org/abs/0000.00000",
+            "score": 1.0,
+            "source": "arXiv",
+        }]
+
+    monkeypatch.setattr(citation_routes, "unified_semantic_search", fake_search)
+    app = FastAPI()
+    app.include_router(citation_routes.router)
+    return TestClient(app)
+
+
+def test_recommend_batch_keeps_text_order(monkeypatch):
+    texts = [f"paragraph {i}" for i in range(6)]
+    delays = {text: 0.01 * (len(texts) - i) for i, text in enumerate(texts)}
+    client = _client(monkeypatch, delays)
+
+    response = client.post("/citation_router/recommend_batch", json={"texts": texts})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["query"] for result in results] == texts
+    assert [result["results"][0]["title"] for result in results] == texts
+
+
+def test_recommend_batch_rejects_too_many_texts(monkeypatch):
+    client = _client(monkeypatch)
+    texts = ["paragraph"] * (MAX_CITATION_BATCH_TEXTS + 1)
+
+    response = client.post("/citation_router/recommend_batch", json={"texts": texts})
+
+    assert response.status_code == 422
+
+
+def test_recommend_batch_rejects_empty_list(monkeypatch):
+    client = _client(monkeypatch)
+
+    response = client.post("/citation_router/recommend_batch", json={"texts": []})
+
+    assert response.status_code == 422
@@ -0,0 +1,79 @@
+import gzip
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.utils.gzip_request import GZipRequestMiddleware
+
+MAX_SIZE = 1024
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(GZipRequestMiddleware, max_size=MAX_SIZE)
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"body": (await request.body()).decode()}
+
+    return TestClient(app)
+
+
+def _post(body: bytes, encoding: str = "gzip"):
+    return _client().post("/echo", content=body, headers={"Content-Encoding": encoding})
+
+
+def test_valid_body_is_decompressed():
+    response = _post(gzip.compress(b'{"question": "hi"}'))
+
+    assert response.status_code == 200
+    assert response.json() == {"body": '{"question": "hi"}'}
+
+
+def test_upper_case_encoding_is_decompressed():
+    response = _post(gzip.compress(b"payload"), encoding=" GZIP ")
+
+    assert response.status_code == 200
+    assert response.json() == {"body": "payload"}
+
+
+def test_multi_member_body_is_decompressed_whole():
+    response = _post(gzip.compress(b"first ") + gzip.compress(b"second"))
+
+    assert response.status_code == 200
+    assert response.json() == {"body": "first second"}
+
+
+def test_truncated_body_is_rejected():
+    compressed = gzip.compress(b"payload" * 50)
+
+    response = _post(compressed[: len(compressed) // 2])
+
+    assert response.status_code == 400
+
+
+def test_trailing_garbage_is_rejected():
+    response = _post(gzip.compress(b"payload") + b"garbage")
+
+    assert response.status_code == 400
+
+
+def test_gzip_bomb_is_rejected():
+    response = _post(gzip.compress(b"\0" * (MAX_SIZE * 100)))
+
+    assert response.status_code == 413
+
+
+def test_members_together_over_limit_are_rejected():
+    member = gzip.compress(b"a" * (MAX_SIZE // 2 + 1))
+
+    response = _post(member + member)
+
+    assert response.status_code == 413
+
+
+def test_body_exactly_at_limit_is_accepted():
+    response = _post(gzip.compress(b"a" * MAX_SIZE))
+
+    assert response.status_code == 200
+    assert len(response.json()["body"]) == MAX_SIZE
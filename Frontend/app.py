@@ -1,5 +1,31 @@
 import streamlit as st
 import requests
+import copy
+import gzip
+import hashlib
+import json
+import threading
+from cachetools import TTLCache
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Optional: stream multipart uploads instead of building the body in memory
+try:
+    from requests_toolbelt import MultipartEncoder
+    TOOLBELT_AVAILABLE = True
+except ImportError:
+    TOOLBELT_AVAILABLE = False
+    print("Warning: requests-toolbelt not available, PDF uploads are buffered in memory")
+
+# Optional: faster JSON encoding/decoding for large search responses
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    print("Warning: orjson not available, using the standard json module")
 
 # -----------------------
 # 🎨 Page Config
@@ -7,6 +33,229 @@ import requests
 st.set_page_config(page_title="📄 ScholarAssistant", layout="wide")
 st.title("📄 ScholarAssistant")
 
+# -----------------------
+# 🔌 Backend Session
+# -----------------------
+@st.cache_resource
+def get_session() -> requests.Session:
+    """
+    One pooled HTTP session shared across reruns, so backend calls reuse
+    keep-alive connections instead of opening a new one each time.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=2, backoff_factor=0.2)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+SESSION = get_session()
+
+# (connect, read) timeouts for backend calls, so a stalled backend surfaces as an
+# error instead of leaving a worker thread and its progress message stuck forever
+REQUEST_TIMEOUT = (3.05, 180)
+
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    """Worker threads that run backend calls while the page stays responsive."""
+    return ThreadPoolExecutor(max_workers=8)
+
+EXECUTOR = get_executor()
+
+@st.cache_resource
+def get_response_cache():
+    """
+    Backend responses shared by all sessions for an hour, with the lock guarding
+    them. Lookups happen on the script thread; worker threads only add the
+    responses they fetched, so they never call Streamlit's caching APIs.
+    """
+    return TTLCache(maxsize=160, ttl=3600), threading.Lock()
+
+RESPONSE_CACHE, RESPONSE_CACHE_LOCK = get_response_cache()
+
+
+def start_request(key, fn, *args, **kwargs):
+    """
+    Run a backend call in the background; its future is kept in session state under key.
+    Resubmitting the same call while it is still running (e.g. a double click) is a no-op.
+    """
+    # Functions among the arguments are identified by name: they are redefined on every rerun
+    call = (fn.__name__, tuple(arg.__name__ if callable(arg) else arg for arg in args), kwargs)
+    request_hash = hashlib.blake2b(repr(call).encode("utf-8"), digest_size=16).digest()
+    if key in st.session_state and st.session_state.get(f"{key}_hash") == request_hash:
+        return
+    st.session_state[f"{key}_hash"] = request_hash
+    st.session_state[key] = EXECUTOR.submit(fn, *args, **kwargs)
+
+
+def start_cached_request(key, cache_key, fn, *args):
+    """
+    start_request for a call whose response is shared through RESPONSE_CACHE
+    under cache_key. A cached response completes the request right away; on a
+    miss the worker stores the response it fetched (failures are not cached).
+    """
+    with RESPONSE_CACHE_LOCK:
+        cached = RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        future = Future()
+        # Handlers may add fields to the response, so each request gets its own copy
+        future.set_result(copy.deepcopy(cached))
+        st.session_state[key] = future
+        return
+    start_request(key, _fetch_and_cache, cache_key, fn, *args)
+
+
+def _fetch_and_cache(cache_key, fn, *args):
+    """Worker side of start_cached_request."""
+    response = fn(*args)
+    with RESPONSE_CACHE_LOCK:
+        RESPONSE_CACHE[cache_key] = copy.deepcopy(response)
+    return response
+
+
+def await_request(key, message, on_response):
+    """
+    While the request under key is running, show message and poll it. When it
+    finishes, on_response handles the response (raising on failure) and the
+    page reruns to show the results.
+    """
+    if key in st.session_state:
+        _poll_request(key, message, on_response)
+    error = st.session_state.pop(f"{key}_error", None)
+    if error:
+        st.error(error)
+
+
+@st.fragment(run_every=0.5)
+def _poll_request(key, message, on_response):
+    future = st.session_state.get(key)
+    if future is None:
+        return
+    if not future.done():
+        st.info(f"⏳ {message}")
+        return
+    del st.session_state[key]
+    try:
+        on_response(future.result())
+    except Exception as e:
+        st.session_state[f"{key}_error"] = f"❌ Error: {e}"
+    st.rerun()
+
+
+def upload_pdf(uploaded_file) -> dict:
+    """POST a PDF to the backend for extraction and summarization."""
+    uploaded_file.seek(0)
+    if TOOLBELT_AVAILABLE:
+        # The encoder reads the upload in chunks, so no second copy of the PDF is made
+        encoder = MultipartEncoder(fields={"files": (uploaded_file.name, uploaded_file, "application/pdf")})
+        response = SESSION.post(
+            "http://127.0.0.1:8000/pdf/upload",
+            data=encoder,
+            headers={"Content-Type": encoder.content_type},
+            timeout=REQUEST_TIMEOUT
+        )
+    else:
+        files = {"files": (uploaded_file.name, uploaded_file.getvalue(), "application/pdf")}
+        response = SESSION.post("http://127.0.0.1:8000/pdf/upload", files=files, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return parse_json(response)
+
+
+def parse_json(response: requests.Response):
+    """Decode a JSON response body."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return response.json()
+
+# Chat messages sent with each question; the full history is still shown, but
+# the payload stays the same size however long the conversation gets
+CHAT_HISTORY_MESSAGES = 16
+
+# Characters of each abstract shown in the full pipeline's paper list
+ABSTRACT_PREVIEW_CHARS = 300
+
+# JSON bodies above this size are gzip-compressed before sending
+GZIP_MIN_BYTES = 4096
+
+def post_json(url: str, payload: dict) -> requests.Response:
+    """POST a JSON payload, gzip-compressing large bodies (level 1: cheap on CPU)."""
+    body = orjson.dumps(payload) if ORJSON_AVAILABLE else json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if len(body) > GZIP_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=1)
+        headers["Content-Encoding"] = "gzip"
+    return SESSION.post(url, data=body, headers=headers, timeout=REQUEST_TIMEOUT)
+
+
+def ask_question(payload: dict, pdf_id: str, pdf_text: str):
+    """
+    POST a question about the uploaded PDF, referencing it by pdf_id so its text
+    isn't resent every turn; falls back to sending the text if the backend no
+    longer has it (or returned no id).
+    """
+    url = "http://127.0.0.1:8000/pdf/question"
+    if pdf_id:
+        response = post_json(url, {**payload, "pdf_ids": [pdf_id]})
+        if response.status_code != 404:
+            return response
+    return post_json(url, {**payload, "pdf_texts": [pdf_text]})
+
+
+def build_bibtex(paper: dict, idx: int) -> str:
+    """BibTeX entry for a recommended paper."""
+    source = paper.get('source', 'unknown')
+    venue = paper.get('venue', '')
+    # Determine journal based on source
+    journal = "arXiv" if source == 'arxiv' else (venue if venue else "Semantic Scholar")
+    return f"""@article{{{paper.get('paperId', 'paper').replace('-', '') if paper.get('paperId') else 'paper'}{idx},
+    title={{ {paper['title']} }},
+    author={{ {', '.join(paper['authors']) if paper['authors'] else 'Unknown'} }},
+    journal={{ {journal} }},
+    year={{ {paper['published'][:4] if len(paper['published']) >= 4 else 'Unknown'} }},
+    url={{ {paper['link']} }}
+}}"""
+
+
+@lru_cache(maxsize=512)
+def paper_caption(authors: tuple, published: str, source_badge: str, score: float, venue: str = "") -> str:
+    """
+    Caption lines of a paper card, memoized so reruns over unchanged results
+    reuse the formatted strings.
+    """
+    venue_text = f" | **Venue:** {venue}" if venue else ""
+    return (
+        f"**Authors:** {', '.join(authors) if authors else 'Unknown'}  \n"
+        f"**Published:** {published}{venue_text}  \n"
+        f"**Source:** {source_badge} | **Semantic Score:** {score:.4f}"
+    )
+
+
+def normalize_query(text: str) -> str:
+    """
+    Collapse whitespace in search input, so text that differs only in spacing or
+    line breaks is sent identically and served from the response cache.
+    """
+    return " ".join(text.split())
+
+
+def fetch_json(url: str, payload: dict) -> dict:
+    """POST a search request and return its JSON."""
+    response = post_json(url, payload)
+    response.raise_for_status()
+    return parse_json(response)
+
+
+def start_search_request(key: str, url: str, payload: dict):
+    """
+    Start a search request, cached on the URL and full payload so resubmitting
+    the same query and options doesn't hit the backend again.
+    """
+    cache_key = (url, json.dumps(payload, sort_keys=True))
+    start_cached_request(key, cache_key, fetch_json, url, payload)
+
 # -----------------------
 # 🧭 Sidebar Navigation
 # -----------------------
@@ -17,32 +266,50 @@ app_mode = st.sidebar.radio("Choose Feature:", ["Chat with PDF", "Citation Recom
 # -----------------------
 if app_mode == "Chat with PDF":
     # --- Session States ---
-    for key in ["pdf_text", "pdf_summary", "conversation_history", "uploaded_filename"]:
+    for key in ["pdf_text", "pdf_id", "pdf_summary", "conversation_history", "uploaded_filename", "uploaded_hash"]:
         if key not in st.session_state:
-            st.session_state[key] = "" if "text" in key or key == "uploaded_filename" else []
+            st.session_state[key] = [] if key == "conversation_history" else ""
+
+    def add_chat_message(role, content):
+        """Record a chat message for display."""
+        st.session_state.conversation_history.append({"role": role, "content": content})
+
+    def recent_history():
+        """The last CHAT_HISTORY_MESSAGES messages, formatted for the backend."""
+        return "\n".join(
+            f"{chat['role'].capitalize()}: {chat['content']}"
+            for chat in st.session_state.conversation_history[-CHAT_HISTORY_MESSAGES:]
+        )
 
     # --- Upload PDF ---
     st.sidebar.header("📤 Upload PDF")
     uploaded_file = st.sidebar.file_uploader("Upload a PDF file", type="pdf")
 
     if uploaded_file:
-        if uploaded_file.name != st.session_state.uploaded_filename:
+        # A new document is recognized by its content, not its file name
+        content_hash = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+        if content_hash != st.session_state.uploaded_hash:
             st.session_state.pdf_text = ""
+            st.session_state.pdf_id = ""
             st.session_state.pdf_summary = ""
             st.session_state.conversation_history = []
             st.session_state.uploaded_filename = uploaded_file.name
+            st.session_state.uploaded_hash = content_hash
 
-            files = {"files": (uploaded_file.name, uploaded_file.getvalue(), "application/pdf")}
-            with st.spinner("📚 Extracting and summarizing your PDF..."):
-                response = requests.post("http://127.0.0.1:8000/pdf/upload", files=files)
-            
-            if response.status_code == 200:
-                data = response.json()
-                st.session_state.pdf_text = data["pdf_texts"][0]
-                st.session_state.pdf_summary = data["summaries"][0]
-                st.sidebar.success(f"✅ '{uploaded_file.name}' uploaded successfully!")
-            else:
-                st.sidebar.error("❌ Error uploading the PDF.")
+            # Cached by content hash only, so the same document uploaded again
+            # (under any name) doesn't go to the backend a second time
+            start_cached_request("pdf_upload", ("pdf_upload", content_hash), upload_pdf, uploaded_file)
+
+    def on_upload_response(data):
+        st.session_state.pdf_text = data["pdf_texts"][0]
+        st.session_state.pdf_id = (data.get("pdf_ids") or [""])[0] or ""
+        st.session_state.pdf_summary = data["summaries"][0]
+        st.session_state.upload_success = f"✅ '{st.session_state.uploaded_filename}' uploaded successfully!"
+
+    with st.sidebar:
+        await_request("pdf_upload", "📚 Extracting and summarizing your PDF...", on_upload_response)
+    if "upload_success" in st.session_state:
+        st.sidebar.success(st.session_state.pop("upload_success"))
 
     if st.sidebar.button("🗑️ Clear Chat"):
         st.session_state.conversation_history = []
@@ -59,37 +326,38 @@ if app_mode == "Chat with PDF":
         with st.chat_message(chat["role"]):
             st.markdown(chat["content"])
 
-    question = st.chat_input("Ask a question about the uploaded PDF...")
+    def on_answer_response(response):
+        if response.status_code != 200:
+            raise RuntimeError(f"could not generate an answer: {response.text}")
+        answer = parse_json(response)["answer"]
+        add_chat_message("assistant", answer)
+
+    await_request("pdf_question", "🤔 Thinking...", on_answer_response)
+
+    # One question at a time: the input is disabled until the pending answer arrives
+    question = st.chat_input("Ask a question about the uploaded PDF...", disabled="pdf_question" in st.session_state)
     if question:
         if not st.session_state.pdf_text:
             st.warning("Please upload a PDF first.")
         else:
             st.chat_message("user").markdown(question)
-            st.session_state.conversation_history.append({"role": "user", "content": question})
+            add_chat_message("user", question)
 
             payload = {
-                "pdf_texts": [st.session_state.pdf_text],
                 "question": question,
-                "conversation_history": "\n".join(
-                    [f"{msg['role'].capitalize()}: {msg['content']}" for msg in st.session_state.conversation_history]
-                ),
+                "conversation_history": recent_history(),
             }
-            with st.spinner("🤔 Thinking..."):
-                response = requests.post("http://127.0.0.1:8000/pdf/question", json=payload)
-            if response.status_code == 200:
-                answer = response.json()["answer"]
-                with st.chat_message("assistant"):
-                    st.markdown(answer)
-                st.session_state.conversation_history.append({"role": "assistant", "content": answer})
-            else:
-                st.error(f"❌ Error generating answer: {response.text}")
+            start_request(
+                "pdf_question", ask_question, payload, st.session_state.pdf_id, st.session_state.pdf_text
+            )
+            st.rerun()
 
 # -----------------------
 # 2️⃣ Citation Recommender
 # -----------------------
 elif app_mode == "Citation Recommender":
     # --- Session States ---
-    for key in ["citation_results", "search_query", "text_input", "sources_used"]:
+    for key in ["citation_results", "search_query", "text_input", "sources_used", "citation_bibtex"]:
         if key not in st.session_state:
             st.session_state[key] = [] if key in ["citation_results", "sources_used"] else ""
 
@@ -127,91 +395,81 @@ elif app_mode == "Citation Recommender":
         elif not use_arxiv and not use_semantic_scholar:
             st.warning("Please select at least one source (arXiv or Semantic Scholar)!")
         else:
-            with st.spinner("🔍 Generating queries and searching arXiv & Semantic Scholar..."):
-                try:
-                    API_URL = "http://localhost:8000/citation_router/recommend"
-                    payload = {
-                        "text": st.session_state.text_input,
-                        "use_arxiv": use_arxiv,
-                        "use_semantic_scholar": use_semantic_scholar,
-                        "max_results_per_source": max_results,
-                        "top_k": top_k,
-                        "use_sbert": use_sbert
-                    }
-                    response = requests.post(API_URL, json=payload)
-                    response.raise_for_status()
-                    data = response.json()
-
-                    st.session_state.search_query = data.get("query", "")
-                    st.session_state.citation_results = data.get("results", [])
-                    st.session_state.sources_used = data.get("sources_used", [])
-
-                except Exception as e:
-                    st.error(f"❌ Error: {e}")
-
-        # --- Display Results ---
-    if st.session_state.citation_results:
-        # Show sources used
-        if hasattr(st.session_state, 'sources_used') and st.session_state.sources_used:
-            sources_badges = " | ".join([f"**{source}**" for source in st.session_state.sources_used])
-            st.markdown(f"### 📊 Sources: {sources_badges}")
+            API_URL = "http://localhost:8000/citation_router/recommend"
+            payload = {
+                "text": normalize_query(st.session_state.text_input),
+                "use_arxiv": use_arxiv,
+                "use_semantic_scholar": use_semantic_scholar,
+                "max_results_per_source": max_results,
+                "top_k": top_k,
+                "use_sbert": use_sbert
+            }
+            start_search_request("citation_request", API_URL, payload)
+
+    def on_citation_response(data):
+        st.session_state.search_query = data.get("query", "")
+        st.session_state.citation_results = data.get("results", [])
+        st.session_state.sources_used = data.get("sources_used", [])
+        # Built once per response instead of on every rerun of the results
+        st.session_state.citation_bibtex = "\n\n".join(
+            build_bibtex(paper, idx) for idx, paper in enumerate(st.session_state.citation_results, 1)
+        )
+
+    await_request(
+        "citation_request",
+        "🔍 Generating queries and searching arXiv & Semantic Scholar...",
+        on_citation_response
+    )
+
+    # --- Display Results ---
+    # A fragment: clicking the download button reruns only the results, not the page
+    @st.fragment
+    def render_citation_results():
+        if st.session_state.citation_results:
+            # Show sources used
+            if hasattr(st.session_state, 'sources_used') and st.session_state.sources_used:
+                sources_badges = " | ".join([f"**{source}**" for source in st.session_state.sources_used])
+                st.markdown(f"### 📊 Sources: {sources_badges}")
         
-        st.markdown("### 🔍 Generated Search Query")
-        st.info(st.session_state.search_query)
-
-        st.markdown(f"### 📄 Top {len(st.session_state.citation_results)} Papers")
-        for idx, paper in enumerate(st.session_state.citation_results, 1):
-            with st.container():
-                # Determine source badge
-                source = paper.get('source', 'unknown')
-                if source == 'arxiv':
-                    source_badge = "📚 arXiv"
-                elif source == 'semantic_scholar':
-                    source_badge = "🎓 Semantic Scholar"
-                else:
-                    source_badge = "📄 Unknown Source"
+            st.markdown("### 🔍 Generated Search Query")
+            st.info(st.session_state.search_query)
+
+            st.markdown(f"### 📄 Top {len(st.session_state.citation_results)} Papers")
+            for idx, paper in enumerate(st.session_state.citation_results, 1):
+                with st.container(border=True):
+                    # Determine source badge
+                    source = paper.get('source', 'unknown')
+                    if source == 'arxiv':
+                        source_badge = "📚 arXiv"
+                    elif source == 'semantic_scholar':
+                        source_badge = "🎓 Semantic Scholar"
+                    else:
+                        source_badge = "📄 Unknown Source"
                 
-                # Get venue if available
-                venue = paper.get('venue', '')
-                venue_text = f" | <strong>Venue:</strong> {venue}" if venue else ""
+                    # Get venue if available
+                    venue = paper.get('venue', '')
                 
-                st.markdown(
-                    f"""
-                    <div style="border:1px solid #e0e0e0; padding:15px; border-radius:10px; margin-bottom:10px; background-color:#f9f9f9">
-                        <h4 style="margin:0; color:#2B7A78;">{idx}. {paper['title']}</h4>
-                        <p style="margin:0; font-size:14px; color:#555;"><strong>Authors:</strong> {', '.join(paper['authors']) if paper['authors'] else 'Unknown'}</p>
-                        <p style="margin:0; font-size:14px; color:#555;"><strong>Published:</strong> {paper['published']}{venue_text}</p>
-                        <p style="margin:0; font-size:14px; color:#555;"><strong>Source:</strong> {source_badge} | <strong>Semantic Score:</strong> {paper['score']:.4f}</p>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
-                # Collapsible Abstract using Streamlit expander
-                with st.expander("📖 Abstract"):
-                    st.write(paper['summary'])
-
-                # Paper link
-                link_text = "🔗 View Paper" if source == 'arxiv' else "🔗 View on Semantic Scholar"
-                st.markdown(f"[{link_text}]({paper['link']})")
-
-                # BibTeX download
-                # Determine journal based on source
-                journal = "arXiv" if source == 'arxiv' else (venue if venue else "Semantic Scholar")
-                bibtex = f"""@article{{{paper.get('paperId', 'paper').replace('-', '') if paper.get('paperId') else 'paper'}{idx},
-    title={{ {paper['title']} }},
-    author={{ {', '.join(paper['authors']) if paper['authors'] else 'Unknown'} }},
-    journal={{ {journal} }},
-    year={{ {paper['published'][:4] if len(paper['published']) >= 4 else 'Unknown'} }},
-    url={{ {paper['link']} }}
-}}"""
-                st.download_button(
-                    label="📥 Download BibTeX",
-                    data=bibtex,
-                    file_name=f"{paper['title'][:50].replace(' ', '_')}.bib",
-                    mime="text/plain",
-                    key=f"bib_{paper.get('paperId', idx)}_{hash(paper['title'])}"
-                )
-                st.markdown("---")
+                    # Native elements inside one bordered container per paper; the
+                    # paper link shares the caption element rather than getting its own
+                    link_text = "🔗 View Paper" if source == 'arxiv' else "🔗 View on Semantic Scholar"
+                    st.markdown(f"#### {idx}. {paper['title']}")
+                    st.caption(paper_caption(
+                        tuple(paper['authors'] or ()), paper['published'], source_badge, paper['score'], venue
+                    ) + f"  \n[{link_text}]({paper['link']})")
+                    # Collapsible Abstract using Streamlit expander
+                    with st.expander("📖 Abstract"):
+                        st.write(paper['summary'])
+
+            # One download for all entries instead of a button per paper
+            st.download_button(
+                label="📥 Download all BibTeX",
+                data=st.session_state.citation_bibtex,
+                file_name="citations.bib",
+                mime="text/plain",
+                key="bib_all"
+            )
+
+    render_citation_results()
 
 # -----------------------
 # 3️⃣ Semantic Search
@@ -248,47 +506,43 @@ elif app_mode == "Semantic Search":
             if not st.session_state.semantic_input.strip():
                 st.warning("Please enter a search query!")
             else:
-                with st.spinner("🔍 Searching arXiv and Semantic Scholar..."):
-                    try:
-                        API_URL = "http://localhost:8000/semantic/search"
-                        payload = {
-                            "query": st.session_state.semantic_input,
-                            "max_results_per_source": max_results,
-                            "top_k": top_k,
-                            "use_sbert": True
-                        }
-                        response = requests.post(API_URL, json=payload)
-                        response.raise_for_status()
-                        data = response.json()
-                        
-                        st.session_state.search_query = data["query"]
-                        st.session_state.semantic_results = data["results"]
-                        
-                    except Exception as e:
-                        st.error(f"❌ Error: {e}")
+                API_URL = "http://localhost:8000/semantic/search"
+                payload = {
+                    "query": normalize_query(st.session_state.semantic_input),
+                    "max_results_per_source": max_results,
+                    "top_k": top_k,
+                    "use_sbert": True
+                }
+                start_search_request("semantic_request", API_URL, payload)
         
-        # Display search results
-        if st.session_state.semantic_results:
-            st.markdown(f"### 📊 Found {len(st.session_state.semantic_results)} papers")
+        def on_search_response(data):
             
-            for idx, paper in enumerate(st.session_state.semantic_results, 1):
-                with st.container():
-                    source_badge = "📚 arXiv" if paper.get("source") == "arxiv" else "🎓 Semantic Scholar"
-                    st.markdown(
-                        f"""
-                        <div style="border:1px solid #e0e0e0; padding:15px; border-radius:10px; margin-bottom:10px; background-color:#f9f9f9">
-                            <h4 style="margin:0; color:#2B7A78;">{idx}. {paper['title']}</h4>
-                            <p style="margin:0; font-size:14px; color:#555;"><strong>Authors:</strong> {', '.join(paper['authors'])}</p>
-                            <p style="margin:0; font-size:14px; color:#555;"><strong>Published:</strong> {paper['published']} | <strong>Source:</strong> {source_badge}</p>
-                            <p style="margin:0; font-size:14px; color:#555;"><strong>Semantic Score:</strong> {paper['score']:.4f}</p>
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
-                    with st.expander("📖 Abstract"):
-                        st.write(paper['summary'])
-                    st.markdown(f"[🔗 View Paper]({paper['link']})")
-                    st.markdown("---")
+            st.session_state.search_query = data["query"]
+            st.session_state.semantic_results = data["results"]
+        
+        await_request("semantic_request", "🔍 Searching arXiv and Semantic Scholar...", on_search_response)
+        
+        # Display search results in a fragment, so interactions inside it rerun only the results
+        @st.fragment
+        def render_semantic_results():
+            if st.session_state.semantic_results:
+                st.markdown(f"### 📊 Found {len(st.session_state.semantic_results)} papers")
+            
+                for idx, paper in enumerate(st.session_state.semantic_results, 1):
+                    with st.container(border=True):
+                        source_badge = "📚 arXiv" if paper.get("source") == "arxiv" else "🎓 Semantic Scholar"
+                        st.markdown(f"#### {idx}. {paper['title']}")
+                        st.caption(paper_caption(
+                            tuple(paper['authors'] or ()),
+                            paper['published'],
+                            source_badge,
+                            paper['score'],
+                            paper.get('venue', '')
+                        ) + f"  \n[🔗 View Paper]({paper['link']})")
+                        with st.expander("📖 Abstract"):
+                            st.write(paper['summary'])
+
+        render_semantic_results()
     
     # --- Full Pipeline Tab ---
     with pipeline_tab:
@@ -314,25 +568,29 @@ elif app_mode == "Semantic Search":
             if not pipeline_query.strip():
                 st.warning("Please enter a query!")
             else:
-                with st.spinner("🔄 Running full pipeline (this may take a moment)..."):
-                    try:
-                        API_URL = "http://localhost:8000/semantic/pipeline"
-                        payload = {
-                            "query": pipeline_query,
-                            "max_results_per_source": pipeline_max_results,
-                            "top_k": pipeline_top_k,
-                            "use_sbert": True,
-                            "generate_summary": generate_summary,
-                            "generate_citations": generate_citations
-                        }
-                        response = requests.post(API_URL, json=payload)
-                        response.raise_for_status()
-                        data = response.json()
-                        
-                        st.session_state.pipeline_results = data
-                        
-                    except Exception as e:
-                        st.error(f"❌ Error: {e}")
+                API_URL = "http://localhost:8000/semantic/pipeline"
+                payload = {
+                    "query": normalize_query(pipeline_query),
+                    "max_results_per_source": pipeline_max_results,
+                    "top_k": pipeline_top_k,
+                    "use_sbert": True,
+                    "generate_summary": generate_summary,
+                    "generate_citations": generate_citations
+                }
+                start_search_request("pipeline_request", API_URL, payload)
+        
+        def on_pipeline_response(data):
+            # Abstract previews are cut once here instead of on every rerun
+            for paper in data.get("retrieved_papers") or []:
+                summary = paper.get("summary") or ""
+                paper["preview"] = summary[:ABSTRACT_PREVIEW_CHARS] + ("..." if len(summary) > ABSTRACT_PREVIEW_CHARS else "")
+            st.session_state.pipeline_results = data
+        
+        await_request(
+            "pipeline_request",
+            "🔄 Running full pipeline (this may take a moment)...",
+            on_pipeline_response
+        )
         
         # Display pipeline results
         if st.session_state.pipeline_results:
@@ -352,22 +610,17 @@ elif app_mode == "Semantic Search":
                         st.write(f"**Authors:** {', '.join(paper['authors'])}")
                         st.write(f"**Published:** {paper['published']}")
                         st.write(f"**Score:** {paper['score']:.4f}")
-                        st.write(f"**Abstract:** {paper['summary'][:300]}...")
+                        st.write(f"**Abstract:** {paper['preview']}")
                         st.markdown(f"[🔗 View Paper]({paper['link']})")
             
             # Display citations
             if pipeline_data.get("citations"):
                 st.markdown("### 📖 Recommended Citations")
                 for idx, citation in enumerate(pipeline_data["citations"][:5], 1):  # Show top 5
-                    st.markdown(
-                        f"""
-                        <div style="border-left:4px solid #2B7A78; padding-left:10px; margin-bottom:10px;">
-                            <strong>{idx}. {citation['title']}</strong><br>
-                            <small>{', '.join(citation['authors'])} ({citation['published']})</small><br>
-                            <small>Relevance Score: {citation['score']:.4f}</small>
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
-                    st.markdown(f"[🔗 View]({citation['link']})")
-                    st.markdown("---")
+                    with st.container(border=True):
+                        st.markdown(f"**{idx}. {citation['title']}**")
+                        st.caption(
+                            f"{', '.join(citation['authors'])} ({citation['published']})  \n"
+                            f"Relevance Score: {citation['score']:.4f}"
+                        )
+                        st.markdown(f"[🔗 View]({citation['link']})")